@@ -5,7 +5,13 @@ try:
 except DistributionNotFound:
     __version__ = "dev"
 
+from .aggregates import Aggregate, Avg, Count, Max, Min, Sum
 from .client import Client, Error
+from .endpoints import Endpoint
 from .filters import *
-from .model import Model
-from .model_client import ModelClient
+from .limiter import AdaptiveLimiter, BATCH, INTERACTIVE, priority
+from .local import LocalTable
+from .mirror import Mirror
+from .model import IdentityMap, Model
+from .model_client import ModelClient, Session
+from .parallel import ProcessPool, partition_range
@@ -0,0 +1,58 @@
+class Aggregate:
+    """
+    An aggregate function to be computed by PostgREST, for use in `select`
+    See https://postgrest.org/en/v12/references/api/aggregate_functions.html
+
+    Requires PostgREST 12+ with `db-aggregates-enabled`.
+    Columns in `select` that aren't aggregates are used to group the results.
+
+    This class should be subclassed for each function.
+    """
+
+    function = None
+
+    def __init__(self, column, alias=None, cast=None):
+        """
+        alias: the key the result is returned under
+        cast: a PostgreSQL type to cast the result to, e.g. "int"
+        """
+        self.column = column
+        self.alias = alias
+        self.cast = cast
+
+    def __str__(self):
+        s = f"{self.function}()"
+        if self.column is not None:
+            s = f"{self.column}.{s}"
+        if self.alias is not None:
+            s = f"{self.alias}:{s}"
+        if self.cast is not None:
+            s = f"{s}::{self.cast}"
+        return s
+
+
+class Count(Aggregate):
+    """
+    Counts rows; or, if a column is given, non-NULL values of that column
+    """
+
+    function = "count"
+
+    def __init__(self, column=None, alias=None, cast=None):
+        super().__init__(column, alias, cast)
+
+
+class Sum(Aggregate):
+    function = "sum"
+
+
+class Avg(Aggregate):
+    function = "avg"
+
+
+class Min(Aggregate):
+    function = "min"
+
+
+class Max(Aggregate):
+    function = "max"
@@ -1,9 +1,20 @@
 import aiohttp
-from datetime import datetime
+import asyncio
+import codecs
+from contextlib import asynccontextmanager
+import csv
+from datetime import date, time
+import gzip
+import io
 import json
+import os
 from urllib.parse import urljoin, quote as urlquote
 from uuid import UUID
-from .filters import And, Combinatoric, Filter
+import zlib
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+from .endpoints import Balancer, Endpoint
+from .filters import And, Combinatoric, Filter, normalize_filters
 
 
 class Error(aiohttp.ClientResponseError):
@@ -29,32 +40,318 @@ class Error(aiohttp.ClientResponseError):
             error_data=await response.json(),
         )
 
+    def __reduce__(self):
+        # the request info and history can't be pickled (e.g. to be raised from a
+        # ProcessPool worker), so only what describes the error is kept
+        error_data = {
+            "message": self.message,
+            "details": self.details,
+            "hint": self.hint,
+        }
+        return (
+            _unpickle_error,
+            (
+                self.request_info.method,
+                str(self.request_info.real_url),
+                error_data,
+                self.status,
+            ),
+        )
+
+
+def _unpickle_error(method, url, error_data, status):
+    url = URL(url)
+    request_info = aiohttp.RequestInfo(
+        url=url, method=method, headers=CIMultiDictProxy(CIMultiDict()), real_url=url
+    )
+    return Error(request_info, (), error_data, status=status)
+
 
 class JSONEncoder(json.JSONEncoder):
     """
-    A JSONEncoder that supports serialising UUID, datetime and bytes objects
+    A JSONEncoder that supports serialising UUID, date/time and binary objects
     """
 
     def default(self, o):
         if isinstance(o, UUID):
             return str(o)
-        elif isinstance(o, datetime):
+        elif isinstance(o, (date, time)):
             return o.isoformat()
-        elif isinstance(o, bytes):
+        elif isinstance(o, (bytes, bytearray, memoryview)):
             # https://www.postgresql.org/docs/current/datatype-binary.html#id-1.5.7.12.9
             return "\\x" + o.hex()
         return super().default(o)
 
 
+async def iter_json_array(stream):
+    """
+    Incrementally decodes a JSON array from an aiohttp StreamReader,
+    yielding each element as soon as it has been received
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    chunks = stream.iter_any()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+    # length of buffer required before re-attempting to decode a partial element;
+    # grows geometrically so that large elements are not re-parsed for every chunk
+    wanted = 0
+
+    while True:
+        if len(buf) - pos < wanted or pos == len(buf):
+            if eof:
+                raise ValueError("unexpected end of JSON array")
+            try:
+                chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                chunk = b""
+                eof = True
+            buf = buf[pos:] + utf8.decode(chunk, final=eof)
+            pos = 0
+            if len(buf) < wanted and not eof:
+                continue
+            wanted = 0
+
+        # skip whitespace and separators
+        while pos < len(buf) and buf[pos] in " \t\r\n":
+            pos += 1
+        if pos == len(buf):
+            continue
+
+        c = buf[pos]
+        if not started:
+            if c != "[":
+                raise ValueError("expected JSON array")
+            started = True
+            pos += 1
+            continue
+        if c == "]":
+            return
+        if c == ",":
+            pos += 1
+            continue
+
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            wanted = 2 * (len(buf) - pos)
+            continue
+        if (
+            not eof
+            and c not in "{[\""
+            and (end == len(buf) or buf[end] not in ",] \t\r\n")
+        ):
+            # a scalar not followed by a delimiter may be truncated
+            # (e.g. `1` of `1.5`, or `1.` of `1.5e3`)
+            wanted = len(buf) - pos + 1
+            continue
+        pos = end
+        yield value
+
+
+async def iter_file_records(f, format, chunk_size):
+    """
+    Yields the records of a CSV or NDJSON file (opened in binary mode) as bytes,
+    without decoding them. File reads are done in a thread.
+    """
+    loop = asyncio.get_event_loop()
+    pending = b""
+    while True:
+        lines = await loop.run_in_executor(None, f.readlines, chunk_size)
+        if not lines:
+            break
+        for line in lines:
+            if format == "ndjson":
+                line = line.strip()
+                if line:
+                    yield line
+            else:
+                # a quoted CSV field may contain newlines: a record is only
+                # complete once it contains an even number of quotes
+                pending += line
+                if pending.count(b'"') % 2 == 0:
+                    record = pending.rstrip(b"\r\n")
+                    pending = b""
+                    if record:
+                        yield record + b"\n"
+    if pending:
+        yield pending.rstrip(b"\r\n") + b"\n"
+
+
+async def read_ahead(records, chunk_size, chunks=2):
+    """
+    Yields the records (bytes) of an async iterable, consuming it from a separate task
+    so that reading and encoding overlap with sending. At most `chunks` batches of
+    about `chunk_size` bytes are read ahead.
+    """
+    queue = asyncio.Queue(chunks)
+
+    async def produce():
+        try:
+            batch = []
+            size = 0
+            async for record in records:
+                batch.append(record)
+                size += len(record)
+                if size >= chunk_size:
+                    await queue.put((batch, None))
+                    batch = []
+                    size = 0
+            await queue.put((batch, None))
+            await queue.put((None, None))
+        except Exception as e:
+            await queue.put((None, e))
+
+    task = asyncio.ensure_future(produce())
+    try:
+        while True:
+            batch, error = await queue.get()
+            if batch is None:
+                if error is not None:
+                    raise error
+                return
+            for record in batch:
+                yield record
+    finally:
+        task.cancel()
+
+
+async def iter_json_records(rows):
+    """
+    Yields each row of a (sync or async) iterable as encoded JSON
+    """
+    encode = JSONEncoder().encode
+    if hasattr(rows, "__aiter__"):
+        async for row in rows:
+            yield encode(row).encode("utf-8")
+    else:
+        for row in rows:
+            yield encode(row).encode("utf-8")
+
+
+def csv_value(v):
+    """
+    Formats a JSON value for a CSV field in a form PostgreSQL can read back
+    """
+    if v is None:
+        return ""
+    elif v is True:
+        return "true"
+    elif v is False:
+        return "false"
+    elif isinstance(v, (dict, list)):
+        return JSONEncoder().encode(v)
+    return v
+
+
+def parse_content_range(value):
+    """
+    Parses a Content-Range header such as `0-24/3573458` or `*/0`.
+    Returns (first, last, total); any part may be None if unknown
+    """
+    if value is None:
+        return None, None, None
+    value = value.split(" ")[-1]  # strip a unit, e.g. "items 0-24/100"
+    range_part, _, total = value.partition("/")
+    first = last = None
+    if range_part != "*":
+        first, _, last = range_part.partition("-")
+        first, last = int(first), int(last)
+    total = None if total in ("", "*") else int(total)
+    return first, last, total
+
+
 class Client:
-    def __init__(self, instance_url, default_headers=None):
+    def __init__(
+        self,
+        instance_url,
+        default_headers=None,
+        endpoints=None,
+        health_check_interval=None,
+        health_check_path="",
+        compress_threshold=None,
+        compression="gzip",
+        compression_level=6,
+        accept_encoding=None,
+        unix_socket=None,
+        limiter=None,
+        normalize_filters=False,
+    ):
+        """
+        instance_url: the base URL used to build request URLs; a trailing "/" is implied.
+            May be `"unix:/path/to/socket"` to connect to a local PostgREST over a
+            unix domain socket, in which case URLs are built against `http://localhost/`
+
+        endpoints: a list of `Endpoint`s to send requests to;
+            if not provided all requests are sent to `instance_url`.
+            Writes are sent to the endpoint with the "write" role,
+            reads are balanced across all endpoints by latency and outstanding requests.
+
+        health_check_interval: if set, every endpoint is probed with a HEAD request
+            to `health_check_path` every `health_check_interval` seconds,
+            and ejected while it fails
+
+        compress_threshold: if set, insert and update bodies of at least this many bytes
+            are compressed with `compression` ("gzip" or "deflate") at `compression_level`.
+            PostgREST itself doesn't decompress request bodies, so this requires a
+            proxy in front of it that does.
+
+        accept_encoding: overrides the Accept-Encoding header sent with requests.
+            aiohttp decompresses responses incrementally as they are read,
+            so compressed responses are still streamed by `select_iter`.
+
+        unix_socket: path of a unix domain socket to send all requests over,
+            while still building URLs against `instance_url`
+
+        limiter: an `AdaptiveLimiter` that all requests wait for a slot from
+
+        normalize_filters: if True, filters are simplified into a canonical form
+            before being encoded; see `Combinatoric.normalize`
+        """
+        if endpoints is None:
+            endpoints = [Endpoint(instance_url, unix_socket=unix_socket)]
+            instance_url = endpoints[0].url
+        elif unix_socket is not None:
+            raise ValueError("pass 'unix_socket' to each Endpoint instead")
+        elif not instance_url.endswith("/"):
+            # relative URLs are joined onto the whole path, e.g. `http://host/api`
+            instance_url += "/"
         self.instance_url = instance_url
-        self.session = aiohttp.ClientSession(
-            headers=default_headers, json_serialize=JSONEncoder().encode
-        )
+        if compression not in ("gzip", "deflate"):
+            raise ValueError("invalid 'compression' argument")
+        self.compress_threshold = compress_threshold
+        self.compression = compression
+        self.compression_level = compression_level
+        if accept_encoding is not None:
+            default_headers = dict(default_headers) if default_headers else {}
+            default_headers["accept-encoding"] = accept_encoding
+        for endpoint in endpoints:
+            endpoint.session = aiohttp.ClientSession(
+                headers=default_headers,
+                json_serialize=JSONEncoder().encode,
+                connector=endpoint.make_connector(),
+            )
+        self.balancer = Balancer(endpoints)
+        self.endpoints = self.balancer.endpoints
+        self.session = self.balancer.primary.session
+
+        self.health_check_interval = health_check_interval
+        self.health_check_path = health_check_path
+        self.health_check_task = None
+
+        self.limiter = limiter
+        self.normalize_filters = normalize_filters
 
     async def close(self):
-        await self.session.close()
+        if self.health_check_task is not None:
+            self.health_check_task.cancel()
+            self.health_check_task = None
+        for endpoint in self.endpoints:
+            await endpoint.session.close()
 
     async def __aenter__(self):
         return self
@@ -62,6 +359,108 @@ class Client:
     async def __aexit__(self, type, value, tb):
         await self.close()
 
+    # bodies larger than this are compressed in a thread to avoid blocking the event loop
+    compress_in_executor_size = 1024 * 1024
+
+    async def prepare_body(self, item, headers, compression_level=None):
+        """
+        Serialises `item` as a JSON request body, compressing it if it is
+        at least `compress_threshold` bytes. Sets the content headers in `headers`.
+
+        compression_level: overrides the Client's `compression_level`; 0 disables compression
+        """
+        body = JSONEncoder().encode(item).encode("utf-8")
+        headers["content-type"] = "application/json"
+
+        if compression_level is None:
+            compression_level = self.compression_level
+        if (
+            self.compress_threshold is None
+            or len(body) < self.compress_threshold
+            or compression_level == 0
+        ):
+            return body
+
+        if self.compression == "gzip":
+            compress = gzip.compress
+        else:
+            compress = zlib.compress
+        if len(body) >= self.compress_in_executor_size:
+            body = await asyncio.get_event_loop().run_in_executor(
+                None, compress, body, compression_level
+            )
+        else:
+            body = compress(body, compression_level)
+        headers["content-encoding"] = self.compression
+        return body
+
+    @asynccontextmanager
+    async def request(self, method, url, read=False, priority=None, **kwargs):
+        """
+        Performs an HTTP request against the most suitable endpoint.
+
+        url: an absolute URL as returned by `prepare_url`
+        read: whether the request can be served by a read replica
+        priority: the limiter lane (`INTERACTIVE` or `BATCH`) to queue in;
+            defaults to the lane set with `postgrest.priority`
+
+        Used as an async context manager yielding the aiohttp response.
+        """
+        if self.health_check_interval is not None and self.health_check_task is None:
+            self.health_check_task = asyncio.ensure_future(
+                self.balancer.check_forever(
+                    self.health_check_interval, self.health_check_path
+                )
+            )
+
+        admitted = None
+        if self.limiter is not None:
+            admitted = await self.limiter.acquire(priority)
+            # latency is compared between requests of the same method and table
+            kind = (method, url.partition("?")[0])
+            data = kwargs.get("data", None)
+            # a streamed body is sent at the client's pace, so the time until
+            # the response says little about the server's load
+            streamed = data is not None and not isinstance(
+                data, (bytes, bytearray, str, dict)
+            )
+        latency = None
+        overloaded = False
+        try:
+            endpoint = self.balancer.choose(read)
+            if endpoint.url != self.instance_url and url.startswith(
+                self.instance_url
+            ):
+                # rebuild the URL against the endpoint, from its path and query
+                # relative to `instance_url`
+                url = urljoin(endpoint.url, url[len(self.instance_url) :])
+
+            loop = asyncio.get_event_loop()
+            start = loop.time()
+            endpoint.outstanding += 1
+            try:
+                async with endpoint.session.request(
+                    method, url, **kwargs
+                ) as response:
+                    latency = loop.time() - start
+                    overloaded = response.status == 429 or response.status == 503
+                    if response.status >= 500:
+                        self.balancer.failed(endpoint)
+                    else:
+                        self.balancer.observe(endpoint, latency)
+                    yield response
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                self.balancer.failed(endpoint)
+                overloaded = True
+                raise
+            finally:
+                endpoint.outstanding -= 1
+        finally:
+            if admitted is not None:
+                self.limiter.release(
+                    admitted, None if streamed else latency, overloaded, kind
+                )
+
     reserved_query_parameters = set(
         [
             "select",
@@ -77,7 +476,7 @@ class Client:
     )
 
     @staticmethod
-    def prepare_query(select=None, filters=None, limit=None, offset=None):
+    def prepare_query(select=None, filters=None, limit=None, offset=None, order=None):
         query_args = []
 
         if select is not None:
@@ -87,7 +486,8 @@ class Client:
                 # TODO: embedding
                 # TODO: embedded filters?
                 # TODO: escaping
-                select_fields.append(col)
+                # str() renders Aggregates
+                select_fields.append(str(col))
             query_args.append("select=" + ",".join(select_fields))
 
         if filters is not None:
@@ -107,6 +507,11 @@ class Client:
                 else:
                     raise TypeError("expected Combinatoric or named Filter")
 
+        if order is not None:
+            # e.g. ["updated_at.desc", "id"]
+            # See http://postgrest.org/en/v5.2/api.html#ordering
+            query_args.append("order=" + ",".join(urlquote(o) for o in order))
+
         if limit is not None:
             assert type(limit) == int
             query_args.append("limit=%d" % limit)
@@ -118,12 +523,20 @@ class Client:
         return "&".join(query_args)
 
     def prepare_url(
-        self, entity_type, select=None, filters=None, limit=None, offset=None
+        self,
+        entity_type,
+        select=None,
+        filters=None,
+        limit=None,
+        offset=None,
+        order=None,
     ):
         assert entity_type != "rpc"
+        if self.normalize_filters:
+            filters = normalize_filters(filters)
         return urljoin(
             self.instance_url,
-            f"{urlquote(entity_type, safe='')}?{self.prepare_query(select, filters, limit, offset)}",
+            f"{urlquote(entity_type, safe='')}?{self.prepare_query(select, filters, limit, offset, order)}",
         )
 
     async def select(
@@ -135,17 +548,22 @@ class Client:
         singular=False,
         limit=None,
         offset=None,
+        order=None,
     ):
         headers = dict(headers) if headers else {}
 
-        # TODO: support other return formats (e.g. CSV, application/octet-stream)
+        # for CSV see export; for application/octet-stream see select_binary
         if singular:
             headers["accept"] = "application/vnd.pgrst.object+json"
         else:
             headers["accept"] = "application/json"
 
-        async with self.session.get(
-            self.prepare_url(entity_type, select, filters, limit=limit, offset=offset),
+        async with self.request(
+            "GET",
+            self.prepare_url(
+                entity_type, select, filters, limit=limit, offset=offset, order=order
+            ),
+            read=True,
             headers=headers,
         ) as response:
             if response.status == 200 or response.status == 404:
@@ -153,8 +571,313 @@ class Client:
             else:
                 raise await Error.from_response(response)
 
+    async def select_iter(
+        self,
+        entity_type,
+        select=None,
+        filters=None,
+        headers=None,
+        limit=None,
+        offset=None,
+        order=None,
+    ):
+        """
+        Like `select`, but an async iterator that yields each row as it is received,
+        rather than buffering and decoding the whole response at once.
+        Compressed responses are decompressed incrementally.
+        """
+        headers = dict(headers) if headers else {}
+
+        headers["accept"] = "application/json"
+
+        async with self.request(
+            "GET",
+            self.prepare_url(
+                entity_type, select, filters, limit=limit, offset=offset, order=order
+            ),
+            read=True,
+            headers=headers,
+        ) as response:
+            if response.status != 200:
+                raise await Error.from_response(response)
+            async for row in iter_json_array(response.content):
+                yield row
+
+    async def select_binary(
+        self,
+        entity_type,
+        column,
+        filters=None,
+        into=None,
+        headers=None,
+        limit=None,
+        offset=None,
+        order=None,
+    ):
+        """
+        Reads a single binary (e.g. bytea) column as `application/octet-stream`,
+        avoiding the hex encoding of JSON responses.
+        If multiple rows match, their values are concatenated.
+
+        into: where to put the data:
+            `None` to return it as bytes
+            a writable buffer (e.g. a preallocated `bytearray` or `memoryview`)
+                that the response is copied directly into
+            a file object opened in binary mode, which the response is streamed to
+
+        Returns the data if `into` is None, otherwise the number of bytes read
+        """
+        headers = dict(headers) if headers else {}
+
+        headers["accept"] = "application/octet-stream"
+
+        async with self.request(
+            "GET",
+            self.prepare_url(
+                entity_type, [column], filters, limit=limit, offset=offset, order=order
+            ),
+            read=True,
+            headers=headers,
+        ) as response:
+            if response.status != 200:
+                raise await Error.from_response(response)
+
+            if into is None:
+                return await response.read()
+
+            n = 0
+            if hasattr(into, "write"):
+                async for chunk in response.content.iter_any():
+                    into.write(chunk)
+                    n += len(chunk)
+            else:
+                buf = memoryview(into).cast("B")
+                async for chunk in response.content.iter_any():
+                    if n + len(chunk) > len(buf):
+                        raise ValueError("response is larger than the buffer")
+                    buf[n : n + len(chunk)] = chunk
+                    n += len(chunk)
+            return n
+
+    async def count(self, entity_type, filters=None, method="exact", headers=None):
+        """
+        Counts the rows matching `filters` without transferring them.
+
+        method: pass:
+            `"exact"` for an exact count (may be slow on large tables)
+            `"planned"` for the PostgreSQL planner's estimate
+            `"estimated"` for an exact count up to `db-max-rows`, and the planner's estimate beyond that
+
+        Returns the count, or None if the server didn't provide one
+        """
+        if method not in ("exact", "planned", "estimated"):
+            raise ValueError("invalid 'method' argument")
+        headers = dict(headers) if headers else {}
+
+        headers["prefer"] = "count=" + method
+
+        async with self.request(
+            "HEAD",
+            self.prepare_url(entity_type, None, filters),
+            read=True,
+            headers=headers,
+        ) as response:
+            # HEAD responses have no body to describe the error
+            response.raise_for_status()
+            _, _, total = parse_content_range(
+                response.headers.get("content-range", None)
+            )
+            return total
+
+    async def aggregate(
+        self,
+        entity_type,
+        aggregates,
+        group_by=(),
+        filters=None,
+        headers=None,
+        order=None,
+        limit=None,
+        offset=None,
+    ):
+        """
+        Computes aggregates in the database rather than transferring rows.
+
+        aggregates: a list of `Aggregate`s, e.g. `[Count(), Sum("amount", alias="total")]`
+
+        group_by: columns to group by; each is included in the returned rows
+
+        Returns a list of rows, one per group
+        """
+        headers = dict(headers) if headers else {}
+
+        headers["accept"] = "application/json"
+
+        async with self.request(
+            "GET",
+            self.prepare_url(
+                entity_type,
+                list(group_by) + list(aggregates),
+                filters,
+                limit=limit,
+                offset=offset,
+                order=order,
+            ),
+            read=True,
+            headers=headers,
+        ) as response:
+            if response.status != 200:
+                raise await Error.from_response(response)
+            return await response.json()
+
+    export_formats = {"ndjson": None, "json": "application/json", "csv": "text/csv"}
+
+    async def export(
+        self,
+        entity_type,
+        path_or_fileobj,
+        select=None,
+        filters=None,
+        format="ndjson",
+        raw=None,
+        headers=None,
+        limit=None,
+        offset=None,
+        order=None,
+        progress=None,
+        chunk_size=64 * 1024,
+    ):
+        """
+        Writes the rows matching `filters` to a file without holding the result in memory.
+
+        path_or_fileobj: a path, or a file object opened in binary mode
+
+        format: `"ndjson"` (one JSON object per line), `"json"` (an array) or `"csv"`
+
+        raw: if True, the response is copied to the file as-is, without decoding rows.
+            Only possible for "json" and "csv", which PostgREST produces itself;
+            this is the default for those formats.
+            If False, rows are decoded one at a time and re-encoded in `format`.
+
+        progress: called as `progress(bytes_written, rows_written)` after each chunk.
+            In raw mode rows aren't decoded, so `rows_written` is None until the final call,
+            where it is taken from the response's Content-Range.
+
+        Returns (bytes_written, rows_written)
+        """
+        if format not in self.export_formats:
+            raise ValueError("invalid 'format' argument")
+        if raw is None:
+            raw = format != "ndjson"
+        elif raw and format == "ndjson":
+            raise ValueError("PostgREST can't produce ndjson; pass raw=False")
+
+        headers = dict(headers) if headers else {}
+        headers["accept"] = self.export_formats[format] if raw else "application/json"
+
+        if isinstance(path_or_fileobj, (str, bytes, os.PathLike)):
+            with open(path_or_fileobj, "wb") as f:
+                return await self.export(
+                    entity_type,
+                    f,
+                    select=select,
+                    filters=filters,
+                    format=format,
+                    raw=raw,
+                    headers=headers,
+                    limit=limit,
+                    offset=offset,
+                    order=order,
+                    progress=progress,
+                    chunk_size=chunk_size,
+                )
+        f = path_or_fileobj
+
+        written = 0
+        rows = 0
+        async with self.request(
+            "GET",
+            self.prepare_url(
+                entity_type, select, filters, limit=limit, offset=offset, order=order
+            ),
+            read=True,
+            headers=headers,
+        ) as response:
+            if response.status != 200:
+                raise await Error.from_response(response)
+
+            if raw:
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+                    if progress is not None:
+                        progress(written, None)
+                content_range = response.headers.get("content-range", None)
+                first, last, _ = parse_content_range(content_range)
+                if first is not None:
+                    rows = last - first + 1
+                elif content_range is not None:
+                    # an empty result has the range `*`
+                    rows = 0
+                else:
+                    rows = None
+                if progress is not None:
+                    progress(written, rows)
+                return written, rows
+
+            encode = JSONEncoder().encode
+            if format == "csv":
+                text = io.StringIO()
+                writer = csv.writer(text, lineterminator="\n")
+                columns = None
+            elif format == "json":
+                f.write(b"[")
+                written += 1
+
+            buf = []
+            buffered = 0
+            async for row in iter_json_array(response.content):
+                if format == "ndjson":
+                    line = encode(row) + "\n"
+                elif format == "json":
+                    line = ("," if rows else "") + encode(row)
+                else:
+                    if columns is None:
+                        columns = list(row.keys())
+                        writer.writerow(columns)
+                    writer.writerow([csv_value(row.get(c, None)) for c in columns])
+                    line = text.getvalue()
+                    text.seek(0)
+                    text.truncate()
+                line = line.encode("utf-8")
+                buf.append(line)
+                buffered += len(line)
+                rows += 1
+                if buffered >= chunk_size:
+                    f.write(b"".join(buf))
+                    written += buffered
+                    buf.clear()
+                    buffered = 0
+                    if progress is not None:
+                        progress(written, rows)
+
+            if format == "json":
+                buf.append(b"]")
+                buffered += 1
+            f.write(b"".join(buf))
+            written += buffered
+            if progress is not None:
+                progress(written, rows)
+            return written, rows
+
     async def insert(
-        self, entity_type, item, headers=None, returning="minimal", select=None
+        self,
+        entity_type,
+        item,
+        headers=None,
+        returning="minimal",
+        select=None,
+        compression_level=None,
     ):
         """
         See http://postgrest.org/en/v5.2/api.html#insertions-updates
@@ -171,6 +894,8 @@ class Client:
 
         select: can be used to return related data (e.g. computed columns);
             only useful when `returning` is `"representation"`
+
+        compression_level: overrides the Client's `compression_level`; 0 disables compression
         """
         headers = dict(headers) if headers else {}
 
@@ -184,8 +909,12 @@ class Client:
         else:
             raise ValueError("invalid 'returning' argument")
 
-        async with self.session.post(
-            self.prepare_url(entity_type, select, None), headers=headers, json=item
+        body = await self.prepare_body(item, headers, compression_level)
+        async with self.request(
+            "POST",
+            self.prepare_url(entity_type, select, None),
+            headers=headers,
+            data=body,
         ) as response:
             if response.status != 201:
                 raise await Error.from_response(response)
@@ -198,8 +927,163 @@ class Client:
                 location = response.headers["location"]
                 return urljoin(self.instance_url, location)
 
+    import_formats = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson"}
+
+    async def import_rows(
+        self,
+        entity_type,
+        source,
+        format=None,
+        headers=None,
+        rows_per_request=None,
+        chunk_size=64 * 1024,
+        progress=None,
+    ):
+        """
+        Inserts rows from a file or iterable, streaming them to PostgREST as a
+        chunked request body rather than building the body in memory.
+
+        source: one of:
+            - a path to a CSV or NDJSON file (the format is inferred from the extension)
+            - a file object opened in binary mode
+            - an iterable or async iterable of rows (e.g. dicts)
+            Files are sent without decoding: CSV as `text/csv`, NDJSON as a JSON array
+
+        format: `"csv"` or `"ndjson"`; required for file objects
+
+        rows_per_request: if set, rows are split across several requests of at most this many rows.
+            Note that each request is a separate transaction.
+
+        progress: called as `progress(bytes_sent, rows_sent)` as the body is produced
+
+        Returns the number of rows sent
+        """
+        if isinstance(source, (str, bytes, os.PathLike)):
+            if format is None:
+                ext = os.path.splitext(os.fsdecode(source))[1].lower()
+                if ext not in self.import_formats:
+                    raise ValueError("unable to infer 'format' from file name")
+                format = self.import_formats[ext]
+            with open(source, "rb") as f:
+                return await self.import_rows(
+                    entity_type,
+                    f,
+                    format=format,
+                    headers=headers,
+                    rows_per_request=rows_per_request,
+                    chunk_size=chunk_size,
+                    progress=progress,
+                )
+
+        if hasattr(source, "readlines"):
+            if format not in ("csv", "ndjson"):
+                raise ValueError("invalid 'format' argument")
+            records = iter_file_records(source, format, chunk_size)
+        else:
+            format = "json"
+            records = iter_json_records(source)
+        records = read_ahead(records, chunk_size)
+
+        headers = dict(headers) if headers else {}
+        headers["accept"] = "application/json"
+        headers["prefer"] = "return=minimal"
+        try:
+            return await self._import_records(
+                entity_type,
+                records,
+                format,
+                headers,
+                rows_per_request,
+                chunk_size,
+                progress,
+            )
+        finally:
+            await records.aclose()
+
+    async def _import_records(
+        self,
+        entity_type,
+        records,
+        format,
+        headers,
+        rows_per_request,
+        chunk_size,
+        progress,
+    ):
+        if format == "csv":
+            headers["content-type"] = "text/csv"
+            try:
+                prefix = await records.__anext__()
+            except StopAsyncIteration:
+                raise ValueError("CSV file has no header") from None
+            separator = b""
+            suffix = b""
+        else:
+            headers["content-type"] = "application/json"
+            prefix = b"["
+            separator = b","
+            suffix = b"]"
+
+        sent_bytes = 0
+        sent_rows = 0
+        exhausted = False
+
+        async def body(first):
+            nonlocal sent_bytes, sent_rows, exhausted
+            buf = [prefix, first]
+            buffered = len(prefix) + len(first)
+            buffered_rows = 1
+            n = 1
+            while rows_per_request is None or n < rows_per_request:
+                try:
+                    record = await records.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                buf.append(separator)
+                buf.append(record)
+                buffered += len(separator) + len(record)
+                buffered_rows += 1
+                n += 1
+                if buffered >= chunk_size:
+                    yield b"".join(buf)
+                    sent_bytes += buffered
+                    sent_rows += buffered_rows
+                    buf.clear()
+                    buffered = 0
+                    buffered_rows = 0
+                    if progress is not None:
+                        progress(sent_bytes, sent_rows)
+            buf.append(suffix)
+            yield b"".join(buf)
+            sent_bytes += buffered + len(suffix)
+            sent_rows += buffered_rows
+            if progress is not None:
+                progress(sent_bytes, sent_rows)
+
+        url = self.prepare_url(entity_type)
+        while not exhausted:
+            try:
+                first = await records.__anext__()
+            except StopAsyncIteration:
+                break
+            async with self.request(
+                "POST", url, headers=headers, data=body(first)
+            ) as response:
+                if response.status != 201:
+                    raise await Error.from_response(response)
+
+        return sent_rows
+
     async def update(
-        self, entity_type, patch, filters, headers=None, returning=None, select=None
+        self,
+        entity_type,
+        patch,
+        filters,
+        headers=None,
+        returning=None,
+        select=None,
+        compression_level=None,
     ):
         """
 
@@ -213,6 +1097,8 @@ class Client:
 
         select: can be used to return related data (e.g. computed columns);
             only useful when `returning` is `"representation"`
+
+        compression_level: overrides the Client's `compression_level`; 0 disables compression
         """
         headers = dict(headers) if headers else {}
 
@@ -222,8 +1108,12 @@ class Client:
         else:
             assert returning is None
             headers.pop("prefer", None)
-        async with self.session.patch(
-            self.prepare_url(entity_type, select, filters), headers=headers, json=patch
+        body = await self.prepare_body(patch, headers, compression_level)
+        async with self.request(
+            "PATCH",
+            self.prepare_url(entity_type, select, filters),
+            headers=headers,
+            data=body,
         ) as response:
             if returning == "representation":
                 if response.status == 200 or response.status == 404:
@@ -241,8 +1131,8 @@ class Client:
         filters: which rows to update. Beware that providing None will update all rows!
         """
 
-        async with self.session.delete(
-            self.prepare_url(entity_type, None, filters), headers=headers
+        async with self.request(
+            "DELETE", self.prepare_url(entity_type, None, filters), headers=headers
         ) as response:
             if response.status != 204:
                 raise await Error.from_response(response)
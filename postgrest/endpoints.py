@@ -0,0 +1,151 @@
+import aiohttp
+import asyncio
+import random
+
+
+class Endpoint:
+    """
+    A PostgREST instance that a Client can send requests to.
+
+    url: the base URL of the PostgREST API; a trailing "/" is implied
+
+    role: `"write"` for the primary, which receives all writes (and may serve reads),
+        or `"read"` for an instance in front of a read replica, which only serves reads
+
+    connector: an aiohttp connector to use for this endpoint's connection pool
+
+    unix_socket: path of a unix domain socket to connect to instead of the host in `url`,
+        e.g. for a PostgREST sidecar. `url` may also be given as `"unix:/path/to/socket"`,
+        in which case requests are made to `http://localhost/` over that socket.
+    """
+
+    def __init__(self, url, role="write", connector=None, unix_socket=None):
+        if role not in ("read", "write"):
+            raise ValueError("invalid 'role' argument")
+        if url.startswith("unix:"):
+            if unix_socket is not None:
+                raise ValueError("unix socket given twice")
+            unix_socket = url[len("unix:") :]
+            url = "http://localhost/"
+        elif not url.endswith("/"):
+            # request paths are joined onto the whole of `url`
+            url += "/"
+        if unix_socket is not None and connector is not None:
+            raise ValueError("can't pass both 'connector' and 'unix_socket'")
+        self.url = url
+        self.role = role
+        self.connector = connector
+        self.unix_socket = unix_socket
+        # created by the Client that uses the endpoint
+        self.session = None
+
+        # exponentially weighted moving average of response latency (seconds)
+        self.latency = None
+        self.outstanding = 0
+        self.failures = 0
+        # loop time until which the endpoint won't be chosen
+        self.ejected_until = None
+
+    def __repr__(self):
+        return f"<Endpoint {self.url} ({self.role})>"
+
+    def make_connector(self):
+        if self.unix_socket is not None:
+            return aiohttp.UnixConnector(path=self.unix_socket)
+        return self.connector
+
+    def is_available(self, now):
+        return self.ejected_until is None or self.ejected_until <= now
+
+    def cost(self, default_latency):
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (self.outstanding + 1)
+
+
+class Balancer:
+    """
+    Chooses endpoints for requests: writes go to the primary, reads to the
+    better of two randomly chosen endpoints by latency and outstanding requests.
+
+    Endpoints are ejected for `eject_duration` seconds after `max_failures`
+    consecutive failures (connection errors or 5xx responses).
+    """
+
+    def __init__(
+        self, endpoints, max_failures=3, eject_duration=30.0, latency_decay=0.3
+    ):
+        writable = [e for e in endpoints if e.role == "write"]
+        if len(writable) != 1:
+            raise ValueError("exactly one endpoint must have the 'write' role")
+        self.primary = writable[0]
+        self.endpoints = list(endpoints)
+        self.max_failures = max_failures
+        self.eject_duration = eject_duration
+        self.latency_decay = latency_decay
+
+    def choose(self, read):
+        if not read or len(self.endpoints) == 1:
+            return self.primary
+
+        now = asyncio.get_event_loop().time()
+        candidates = [e for e in self.endpoints if e.is_available(now)]
+        if not candidates:
+            # fail open rather than refusing every request
+            candidates = self.endpoints
+        if len(candidates) == 1:
+            return candidates[0]
+
+        measured = [e.latency for e in candidates if e.latency is not None]
+        # unmeasured endpoints are assumed to be as fast as the fastest, so they get tried
+        default_latency = min(measured) if measured else 1.0
+        a, b = random.sample(candidates, 2)
+        return a if a.cost(default_latency) <= b.cost(default_latency) else b
+
+    def observe(self, endpoint, latency):
+        """
+        Records a successful response
+        """
+        if endpoint.latency is None:
+            endpoint.latency = latency
+        else:
+            endpoint.latency += self.latency_decay * (latency - endpoint.latency)
+        endpoint.failures = 0
+        endpoint.ejected_until = None
+
+    def failed(self, endpoint):
+        """
+        Records a failed request, ejecting the endpoint if it keeps failing
+        """
+        endpoint.failures += 1
+        if endpoint.failures >= self.max_failures:
+            endpoint.ejected_until = (
+                asyncio.get_event_loop().time() + self.eject_duration
+            )
+
+    async def check(self, endpoint, path="", timeout=5.0):
+        """
+        Performs an active health check of an endpoint
+        """
+        loop = asyncio.get_event_loop()
+        start = loop.time()
+        try:
+            async with endpoint.session.head(
+                endpoint.url + path, timeout=aiohttp.ClientTimeout(total=timeout)
+            ) as response:
+                healthy = response.status < 500
+        except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+            healthy = False
+
+        if healthy:
+            self.observe(endpoint, loop.time() - start)
+        else:
+            # eject immediately; the next successful check readmits it
+            endpoint.failures = max(endpoint.failures + 1, self.max_failures)
+            endpoint.ejected_until = loop.time() + self.eject_duration
+
+    async def check_forever(self, interval, path="", timeout=5.0):
+        while True:
+            await asyncio.gather(
+                *[self.check(e, path, timeout) for e in self.endpoints]
+            )
+            await asyncio.sleep(interval)
@@ -1,6 +1,110 @@
-from datetime import datetime
+from datetime import date, datetime, time
+import operator
+import re
 from urllib.parse import quote as urlquote
 from uuid import UUID
+from .timestamps import parse_date, parse_datetime, parse_time
+
+
+def _converter(v):
+    """
+    Returns a function converting a string (as found in a raw JSON row) to the type of `v`,
+    or None if no conversion is needed
+    """
+    if isinstance(v, UUID):
+        return UUID
+    elif isinstance(v, datetime):
+        return parse_datetime
+    elif isinstance(v, date):
+        return parse_date
+    elif isinstance(v, time):
+        return parse_time
+    return None
+
+
+def _comparison(value, op):
+    """
+    Returns a predicate applying the binary operator `op` with SQL NULL semantics
+    """
+    if value is None:
+        return lambda v: None
+
+    convert = _converter(value)
+    if convert is None:
+
+        def predicate(v):
+            if v is None:
+                return None
+            return op(v, value)
+
+    else:
+
+        def predicate(v):
+            if v is None:
+                return None
+            if type(v) == str:
+                v = convert(v)
+            return op(v, value)
+
+    return predicate
+
+
+def _contains(container, contained):
+    """
+    Implements the PostgreSQL `@>` operator for arrays and jsonb
+    """
+    if isinstance(contained, dict):
+        return isinstance(container, dict) and all(
+            k in container and _contains(container[k], v) for k, v in contained.items()
+        )
+    elif isinstance(contained, (list, tuple, set)):
+        return isinstance(container, (list, tuple, set)) and all(
+            any(_contains(c, x) for c in container) for x in contained
+        )
+    return container == contained
+
+
+_containers = (list, tuple, set, dict)
+
+
+def _check_container(filter, value, types=_containers):
+    """
+    Ensures that `value` is an array (or jsonb), as ranges (which arrive as strings
+    like `"[1,10)"`) can't be evaluated client-side
+    """
+    if not isinstance(value, types):
+        raise NotImplementedError(
+            f"'{filter.operator}' filters can only be evaluated client-side "
+            "on arrays and jsonb"
+        )
+
+
+def _like(pattern, flags):
+    """
+    Returns a predicate for a LIKE pattern (where `*` may be used in place of `%`)
+    """
+    regex = []
+    i = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\" and i + 1 < len(pattern):
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        elif c == "*" or c == "%":
+            regex.append(".*")
+        elif c == "_":
+            regex.append(".")
+        else:
+            regex.append(re.escape(c))
+        i += 1
+    match = re.compile("".join(regex), re.DOTALL | flags).fullmatch
+
+    def predicate(v):
+        if v is None:
+            return None
+        return match(v) is not None
+
+    return predicate
 
 
 class Filter:
@@ -35,8 +139,9 @@ class Filter:
             return "null"
         elif isinstance(v, UUID):
             return str(v)
-        elif isinstance(v, datetime):
-            return v.isoformat()
+        elif isinstance(v, (date, time)):
+            # '+' in UTC offsets must be escaped
+            return urlquote(v.isoformat())
         else:
             raise TypeError("invalid filter parameter type")
 
@@ -46,6 +151,15 @@ class Filter:
     def prepare_query(self, top_level):
         return self.encode_parameter(self.value, top_level)
 
+    def compile(self):
+        """
+        Returns a predicate evaluating the filter against a column value in Python.
+        The predicate returns True, False or None (SQL NULL), following PostgreSQL semantics.
+        """
+        raise NotImplementedError(
+            f"'{self.operator}' filters can't be evaluated client-side"
+        )
+
 
 class Equal(Filter):
     """
@@ -54,6 +168,9 @@ class Equal(Filter):
 
     operator = "eq"
 
+    def compile(self):
+        return _comparison(self.value, operator.eq)
+
 
 class GreaterThan(Filter):
     """
@@ -62,6 +179,9 @@ class GreaterThan(Filter):
 
     operator = "gt"
 
+    def compile(self):
+        return _comparison(self.value, operator.gt)
+
 
 class GreaterThanEqual(Filter):
     """
@@ -70,6 +190,9 @@ class GreaterThanEqual(Filter):
 
     operator = "gte"
 
+    def compile(self):
+        return _comparison(self.value, operator.ge)
+
 
 class LessThan(Filter):
     """
@@ -78,6 +201,9 @@ class LessThan(Filter):
 
     operator = "lt"
 
+    def compile(self):
+        return _comparison(self.value, operator.lt)
+
 
 class LessThanEqual(Filter):
     """
@@ -86,6 +212,9 @@ class LessThanEqual(Filter):
 
     operator = "lte"
 
+    def compile(self):
+        return _comparison(self.value, operator.le)
+
 
 class NotEqual(Filter):
     """
@@ -94,6 +223,9 @@ class NotEqual(Filter):
 
     operator = "neq"
 
+    def compile(self):
+        return _comparison(self.value, operator.ne)
+
 
 class Like(Filter):
     """
@@ -103,6 +235,9 @@ class Like(Filter):
 
     operator = "like"
 
+    def compile(self):
+        return _like(self.value, 0)
+
 
 class ILike(Filter):
     """
@@ -112,6 +247,9 @@ class ILike(Filter):
 
     operator = "ilike"
 
+    def compile(self):
+        return _like(self.value, re.IGNORECASE)
+
 
 class In(Filter):
     """
@@ -121,6 +259,27 @@ class In(Filter):
 
     operator = "in"
 
+    def compile(self):
+        values = [v for v in self.value if v is not None]
+        # x IN (..., NULL) is NULL rather than false when x isn't found
+        has_null = len(values) != len(self.value)
+        convert = _converter(values[0]) if values else None
+        try:
+            values = frozenset(values)
+        except TypeError:
+            pass
+
+        def predicate(v):
+            if v is None:
+                return None
+            if convert is not None and type(v) == str:
+                v = convert(v)
+            if v in values:
+                return True
+            return None if has_null else False
+
+        return predicate
+
 
 class Is(Filter):
     """
@@ -130,6 +289,12 @@ class Is(Filter):
 
     operator = "is"
 
+    def compile(self):
+        value = self.value
+        if value is None or value is True or value is False:
+            return lambda v: v is value
+        return super().compile()
+
 
 class FullTextSearch(Filter):
     """
@@ -166,6 +331,18 @@ class Contains(Filter):
 
     operator = "cs"
 
+    def compile(self):
+        value = self.value
+        _check_container(self, value)
+
+        def predicate(v):
+            if v is None:
+                return None
+            _check_container(self, v)
+            return _contains(v, value)
+
+        return predicate
+
 
 class ContainedIn(Filter):
     """
@@ -175,6 +352,18 @@ class ContainedIn(Filter):
 
     operator = "cd"
 
+    def compile(self):
+        value = self.value
+        _check_container(self, value)
+
+        def predicate(v):
+            if v is None:
+                return None
+            _check_container(self, v)
+            return _contains(value, v)
+
+        return predicate
+
 
 class Overlap(Filter):
     """
@@ -184,6 +373,18 @@ class Overlap(Filter):
 
     operator = "ov"
 
+    def compile(self):
+        value = self.value
+        _check_container(self, value, (list, tuple, set))
+
+        def predicate(v):
+            if v is None:
+                return None
+            _check_container(self, v, (list, tuple, set))
+            return any(x in v for x in value)
+
+        return predicate
+
 
 class StrictlyLeft(Filter):
     """
@@ -246,6 +447,177 @@ class Not(Filter):
     def prepare_query(self, top_level):
         return self.filter.prepare_query(top_level)
 
+    def compile(self):
+        predicate = self.filter.compile()
+
+        def negated(v):
+            r = predicate(v)
+            return None if r is None else not r
+
+        return negated
+
+
+def compile_filter(f):
+    """
+    Returns a predicate evaluating a Combinatoric or named Filter against a row
+    """
+    if isinstance(f, Combinatoric):
+        return f.compile()
+    elif type(f[0]) == str and isinstance(f[1], Filter):
+        field, filter = f
+        if "." in field or "->" in field:
+            raise NotImplementedError(
+                "filters on embedded resources or json paths can't be evaluated client-side"
+            )
+        predicate = filter.compile()
+        return lambda row: predicate(row.get(field, None))
+    else:
+        raise TypeError("expected Combinatoric or named Filter")
+
+
+def _all(predicates):
+    def predicate(row):
+        result = True
+        for p in predicates:
+            r = p(row)
+            if r is False:
+                return False
+            elif r is None:
+                result = None
+        return result
+
+    return predicate
+
+
+def _any(predicates):
+    def predicate(row):
+        result = False
+        for p in predicates:
+            r = p(row)
+            if r is True:
+                return True
+            elif r is None:
+                result = None
+        return result
+
+    return predicate
+
+
+def _negate(predicate):
+    def negated(row):
+        r = predicate(row)
+        return None if r is None else not r
+
+    return negated
+
+
+def compile_filters(filters):
+    """
+    Returns a function that evaluates a list of filters (as passed to `Client.select`)
+    against a row (a dict or Model), returning whether the row would be selected
+    """
+    if not filters:
+        return lambda row: True
+    predicate = _all([compile_filter(f) for f in filters])
+    return lambda row: predicate(row) is True
+
+
+def _filter_key(f):
+    """
+    Returns the encoded form of a Combinatoric or named Filter, for comparisons
+    """
+    if isinstance(f, Combinatoric):
+        return f.operator + f.prepare_query()
+    field, filter = f
+    return f"{urlquote(field)}.{filter.operator}.{filter.prepare_query(top_level=False)}"
+
+
+def _normalize_filter(f):
+    if isinstance(f, Combinatoric):
+        return f.normalize()
+    elif type(f[0]) == str and isinstance(f[1], Filter):
+        field, filter = f
+        while isinstance(filter, Not) and isinstance(filter.filter, Not):
+            filter = filter.filter.filter
+        return (field, filter)
+    else:
+        raise TypeError("expected Combinatoric or named Filter")
+
+
+def _merge_in(filters):
+    """
+    Merges `Equal`s and `In`s on the same field into a single `In`
+    (only valid for alternatives, i.e. under an `Or`)
+    """
+    merged = []
+    values = {}
+    for f in filters:
+        if isinstance(f, tuple):
+            field, filter = f
+            if type(filter) == Equal:
+                candidates = [filter.value]
+            elif type(filter) == In and type(filter.value) in (list, tuple):
+                candidates = list(filter.value)
+            else:
+                candidates = None
+            # NULLs and booleans aren't valid in `in` lists
+            if candidates is not None and all(
+                type(v) in (str, int, float) or isinstance(v, UUID)
+                for v in candidates
+            ):
+                if field not in values:
+                    values[field] = []
+                    merged.append(field)
+                values[field].extend(candidates)
+                continue
+        merged.append(f)
+
+    result = []
+    for f in merged:
+        if type(f) != str:
+            result.append(f)
+            continue
+        field = f
+        encoded = {Filter(None).encode_parameter(v, False): v for v in values[field]}
+        unique = [encoded[k] for k in sorted(encoded)]
+        if len(unique) == 1:
+            result.append((field, Equal(unique[0])))
+        else:
+            result.append((field, In(unique)))
+    return result
+
+
+def normalize_filters(filters):
+    """
+    Returns an equivalent simplified list of filters (as passed to `Client.select`);
+    see `Combinatoric.normalize`
+    """
+    if not filters:
+        return filters
+    f = And(*filters).normalize()
+    if f is None:
+        return []
+    elif f is False:
+        # PostgREST has no literal for false, so contradict a field that's used
+        field = _any_field(filters)
+        if field is None:
+            raise ValueError("filters never match and have no field to express that")
+        return [(field, Is(None)), (field, Not(Is(None)))]
+    elif type(f) is And:
+        return list(f.filters)
+    return [f]
+
+
+def _any_field(filters):
+    for f in filters:
+        if isinstance(f, Combinatoric):
+            field = _any_field(f.filters)
+            if field is not None:
+                return field
+        else:
+            return f[0]
+    return None
+
 
 class Combinatoric:
     """
@@ -270,18 +642,91 @@ class Combinatoric:
                 raise TypeError("expected Combinatoric or named Filter")
         return "(" + ",".join(filters) + ")"
 
+    def compile(self):
+        """
+        Returns a predicate evaluating the filters against a row (a dict or Model).
+        The predicate returns True, False or None (SQL NULL), following PostgreSQL semantics.
+        """
+        raise NotImplementedError
+
+    def normalize(self):
+        """
+        Returns an equivalent simplified filter in a canonical form:
+          - nested combinators of the same kind are flattened
+          - `Equal`s and `In`s on the same field under an `Or` are merged into one `In`
+          - duplicate conditions are removed
+          - combinators with a single condition are replaced by that condition
+          - `Not(Not(...))` is removed
+          - conditions are sorted
+
+        Returns a Combinatoric or named Filter, None if the filter is always true,
+        or False if it is always false.
+        """
+        cls = type(self)
+        negated = cls not in (And, Or)
+        base = _negations[cls] if negated else cls
+
+        filters = []
+        for f in self.filters:
+            f = _normalize_filter(f)
+            if f is None or f is False:
+                if (f is None) == (base is And):
+                    # true under an And, or false under an Or: doesn't affect the result
+                    continue
+                # decides the result of the base operator
+                return None if (f is None) != negated else False
+            if type(f) is base:
+                filters.extend(f.filters)
+            else:
+                filters.append(f)
+
+        if base is Or:
+            filters = _merge_in(filters)
+
+        filters = list({_filter_key(f): f for f in filters}.items())
+        filters.sort(key=lambda item: item[0])
+        filters = [f for _, f in filters]
+
+        if not filters:
+            # an empty And is true and an empty Or is false
+            return None if (base is And) != negated else False
+        if len(filters) == 1:
+            f = filters[0]
+            if not negated:
+                return f
+            elif isinstance(f, Combinatoric):
+                return _negations[type(f)](*f.filters)
+            else:
+                return _normalize_filter((f[0], Not(f[1])))
+        return cls(*filters)
+
 
 class And(Combinatoric):
     operator = "and"
 
+    def compile(self):
+        return _all([compile_filter(f) for f in self.filters])
+
 
 class NotAnd(Combinatoric):
     operator = "not.and"
 
+    def compile(self):
+        return _negate(_all([compile_filter(f) for f in self.filters]))
+
 
 class Or(Combinatoric):
     operator = "or"
 
+    def compile(self):
+        return _any([compile_filter(f) for f in self.filters])
+
 
 class NotOr(Combinatoric):
-    operator = "not.and"
+    operator = "not.or"
+
+    def compile(self):
+        return _negate(_any([compile_filter(f) for f in self.filters]))
+
+
+_negations = {And: NotAnd, NotAnd: And, Or: NotOr, NotOr: Or}
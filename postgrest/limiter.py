@@ -0,0 +1,156 @@
+import asyncio
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Priority lanes: waiting interactive requests are always admitted before batch requests
+INTERACTIVE = 0
+BATCH = 1
+
+_current_priority = ContextVar("postgrest_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(lane):
+    """
+    Sets the priority lane of requests made in the current context:
+
+        with priority(BATCH):
+            await asyncio.gather(*[client.insert("foo", row) for row in rows])
+    """
+    if lane not in (INTERACTIVE, BATCH):
+        raise ValueError("invalid priority lane")
+    token = _current_priority.set(lane)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+class AdaptiveLimiter:
+    """
+    Limits the number of concurrent requests, adapting the limit to what the server can handle.
+
+    The limit grows additively (by about one per round trip) while requests succeed
+    with latency close to the lowest observed, and is cut multiplicatively when
+    requests are rejected (429/503), time out, fail to connect, or when latency rises
+    above `latency_tolerance` times the lowest observed for the same kind of request
+    (e.g. method and table), since different kinds of request can take very different times.
+
+    Pass to `Client(limiter=...)`. `limit`, `in_flight` and `queue_depth`
+    can be read for monitoring.
+    """
+
+    def __init__(
+        self,
+        initial_limit=10,
+        min_limit=1,
+        max_limit=1000,
+        backoff=0.5,
+        latency_tolerance=2.0,
+        baseline_window=30.0,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.baseline_window = baseline_window
+
+        self.in_flight = 0
+        # kind => [lowest observed latency, lowest in the current window, window start].
+        # The lowest observed latency is used as the uncongested baseline. It is
+        # replaced by the lowest of the current window every `baseline_window`
+        # seconds so that it can follow the server's latency upwards
+        self.baselines = {}
+        # loop time of the last decrease; requests started before it don't cause another
+        self.last_decrease = None
+        self.queues = {INTERACTIVE: deque(), BATCH: deque()}
+
+    @property
+    def queue_depth(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def queue_depths(self):
+        return {lane: len(q) for lane, q in self.queues.items()}
+
+    async def acquire(self, lane=None):
+        """
+        Waits for a free slot. Returns the loop time the request was admitted,
+        which must be passed to `release`
+        """
+        if lane is None:
+            lane = _current_priority.get()
+        loop = asyncio.get_event_loop()
+
+        if self.in_flight < int(self.limit) and not self.queue_depth:
+            self.in_flight += 1
+            return loop.time()
+
+        waiter = loop.create_future()
+        self.queues[lane].append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # a slot was handed over just as we were cancelled; pass it on
+                self.in_flight -= 1
+                self._wake()
+            else:
+                self.queues[lane].remove(waiter)
+            raise
+        return loop.time()
+
+    def release(self, start, latency=None, overloaded=False, kind=None):
+        """
+        Frees a slot and adjusts the limit.
+
+        start: as returned by `acquire`
+        latency: time until the response was received; None if there was no response,
+            or if it doesn't reflect the server's load (e.g. a streamed upload)
+        overloaded: whether the server rejected the request or failed to respond in time
+        kind: a hashable identifying the kind of request; latency is only compared
+            with that of requests of the same kind
+        """
+        self.in_flight -= 1
+
+        if latency is not None and not overloaded:
+            min_latency = self._observe_latency(kind, latency)
+            if latency > self.latency_tolerance * min_latency:
+                overloaded = True
+
+        if overloaded:
+            if self.last_decrease is None or start >= self.last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.last_decrease = asyncio.get_event_loop().time()
+        elif latency is not None and self.in_flight + 1 >= int(self.limit):
+            # only grow while the limit is actually being reached
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+        self._wake()
+
+    def _observe_latency(self, kind, latency):
+        """
+        Records the latency of a request of `kind`, returning the baseline for that kind
+        """
+        now = asyncio.get_event_loop().time()
+        baseline = self.baselines.get(kind, None)
+        if baseline is None:
+            baseline = self.baselines[kind] = [latency, latency, now]
+        elif now - baseline[2] >= self.baseline_window:
+            baseline[0] = baseline[1]
+            baseline[1] = latency
+            baseline[2] = now
+        else:
+            baseline[1] = min(baseline[1], latency)
+        baseline[0] = min(baseline[0], latency)
+        return baseline[0]
+
+    def _wake(self):
+        for lane in (INTERACTIVE, BATCH):
+            queue = self.queues[lane]
+            while queue and self.in_flight < int(self.limit):
+                waiter = queue.popleft()
+                if not waiter.done():
+                    self.in_flight += 1
+                    waiter.set_result(None)
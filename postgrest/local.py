@@ -0,0 +1,166 @@
+from uuid import UUID
+from .filters import Equal, In, _converter, compile_filters
+
+
+class LocalTable:
+    """
+    An in-memory table of rows (dicts or Models) that can answer the same
+    filters as `Client.select` without a network request.
+
+    indexes: columns to maintain hash indexes on. Top-level `Equal` and `In`
+        filters on indexed columns are answered by lookup rather than by
+        evaluating every row.
+    """
+
+    def __init__(self, primary_key=("id",), indexes=()):
+        self.primary_key = tuple(primary_key)
+        # rows keyed by primary key tuple
+        self.rows = {}
+        # column => value => {primary key: row}
+        self.indexes = {field: {} for field in indexes}
+        # column => {primary key: row} for rows with unhashable values
+        self.unindexable = {field: {} for field in indexes}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows.values())
+
+    def key(self, row):
+        return tuple(row[field] for field in self.primary_key)
+
+    def get(self, key, default=None):
+        return self.rows.get(key, default)
+
+    def _index(self, key, row):
+        for field, index in self.indexes.items():
+            value = row.get(field, None)
+            try:
+                index.setdefault(value, {})[key] = row
+            except TypeError:
+                self.unindexable[field][key] = row
+
+    def _unindex(self, key, row):
+        for field, index in self.indexes.items():
+            value = row.get(field, None)
+            try:
+                bucket = index.get(value, None)
+            except TypeError:
+                self.unindexable[field].pop(key, None)
+                continue
+            if bucket is not None:
+                bucket.pop(key, None)
+                if not bucket:
+                    del index[value]
+
+    def add(self, row):
+        """
+        Inserts or replaces a row
+        """
+        key = self.key(row)
+        old = self.rows.get(key, None)
+        if old is not None:
+            self._unindex(key, old)
+        self.rows[key] = row
+        self._index(key, row)
+        return old
+
+    def remove(self, key):
+        row = self.rows.pop(key)
+        self._unindex(key, row)
+        return row
+
+    def clear(self):
+        self.rows.clear()
+        for field in self.indexes:
+            self.indexes[field].clear()
+            self.unindexable[field].clear()
+
+    def _lookup(self, field, values):
+        """
+        Returns the rows whose indexed column `field` may equal one of `values`
+        """
+        index = self.indexes[field]
+        candidates = dict(self.unindexable[field])
+        for value in values:
+            if value is None:
+                # NULL never equals anything
+                continue
+            keys = [value]
+            if isinstance(value, UUID):
+                # rows that haven't been decoded hold UUIDs as strings
+                keys.append(str(value))
+            for k in keys:
+                bucket = index.get(k, None)
+                if bucket is not None:
+                    candidates.update(bucket)
+        return candidates
+
+    def _candidates(self, filters):
+        """
+        Returns the smallest set of rows found via an index, or None if no index applies
+        """
+        best = None
+        for f in filters:
+            if not isinstance(f, tuple):
+                continue
+            field, filter = f
+            if field not in self.indexes:
+                continue
+            if type(filter) == Equal:
+                values = [filter.value]
+            elif type(filter) == In:
+                values = filter.value
+            else:
+                continue
+            if any(
+                _converter(v) not in (None, UUID) for v in values if v is not None
+            ):
+                # rows that haven't been decoded hold dates and times as strings,
+                # which can spell the same value in different ways
+                continue
+            try:
+                candidates = self._lookup(field, values)
+            except TypeError:
+                # unhashable filter value
+                continue
+            if best is None or len(candidates) < len(best):
+                best = candidates
+        return best
+
+    def select(self, filters=None, limit=None, offset=None, order=None):
+        """
+        Returns the rows matching `filters`, as `Client.select` would.
+
+        order: as for `Client.select`, e.g. ["updated_at.desc", "id"]
+        """
+        predicate = compile_filters(filters)
+        candidates = self._candidates(filters) if filters else None
+        if candidates is None:
+            candidates = self.rows
+        rows = [row for row in candidates.values() if predicate(row)]
+
+        if order is not None:
+            # stable sorts, applied from the least significant column
+            for o in reversed(order):
+                field, _, modifiers = o.partition(".")
+                modifiers = modifiers.split(".") if modifiers else []
+                descending = "desc" in modifiers
+                if "nullsfirst" in modifiers:
+                    nulls_first = True
+                elif "nullslast" in modifiers:
+                    nulls_first = False
+                else:
+                    # the PostgreSQL default: NULLs sort as if larger than any value
+                    nulls_first = descending
+                present = [r for r in rows if r.get(field, None) is not None]
+                nulls = [r for r in rows if r.get(field, None) is None]
+                present.sort(key=lambda r: r[field], reverse=descending)
+                rows = nulls + present if nulls_first else present + nulls
+
+        if offset is not None:
+            rows = rows[offset:]
+        if limit is not None:
+            rows = rows[:limit]
+        return rows
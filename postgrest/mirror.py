@@ -0,0 +1,140 @@
+import asyncio
+from .filters import And, Equal, GreaterThan, Or
+from .local import LocalTable
+
+
+class Mirror:
+    """
+    Keeps an in-memory copy of a table up to date by polling for rows
+    changed since the previous poll, so that the cost of a refresh scales
+    with the number of changed rows rather than the size of the table.
+
+    The table needs a NOT NULL `watermark` column that increases whenever a
+    row changes, such as an `updated_at` column maintained by a trigger.
+    Rows are fetched in (watermark, primary key) order a page at a time, and
+    the last row seen is remembered so the next poll continues from there.
+
+    Deleted rows are not detected. Rows committed with a watermark older than
+    one already seen (e.g. by a long running transaction) will be missed.
+
+        mirror = Mirror(client, "foo")
+        mirror.add_listener(lambda key, old, new: print(key, old, new))
+        await mirror.poll()  # initial load
+        ...
+        await mirror.poll()  # only fetches changed rows
+
+    Works with both a Client (rows are dicts) and a ModelClient (rows are Models).
+
+    The mirrored rows can be queried with `select`; see `LocalTable`.
+    """
+
+    def __init__(
+        self,
+        client,
+        entity_type,
+        watermark="updated_at",
+        primary_key=("id",),
+        filters=None,
+        page_size=1000,
+        indexes=(),
+    ):
+        self.client = client
+        self.entity_type = entity_type
+        self.watermark_field = watermark
+        self.primary_key = tuple(primary_key)
+        self.filters = list(filters) if filters else []
+        self.page_size = page_size
+
+        self.table = LocalTable(self.primary_key, indexes)
+        # rows keyed by primary key tuple
+        self.rows = self.table.rows
+        # (watermark, *primary key) of the last row seen
+        self.watermark = None
+        self.listeners = []
+
+    def add_listener(self, callback):
+        """
+        Registers `callback(key, old, new)` to be called for every changed row.
+        `old` is None for rows that were not previously known.
+        """
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self.listeners.remove(callback)
+
+    def key(self, row):
+        return self.table.key(row)
+
+    def select(self, filters=None, limit=None, offset=None, order=None):
+        """
+        Answers a query from the mirrored rows; see `LocalTable.select`
+        """
+        return self.table.select(filters, limit=limit, offset=offset, order=order)
+
+    def keyset_filter(self):
+        """
+        Returns a filter matching rows after the current watermark in
+        (watermark, *primary key) order
+        """
+        fields = (self.watermark_field,) + self.primary_key
+        alternatives = []
+        for i, field in enumerate(fields):
+            equal = [(f, Equal(v)) for f, v in zip(fields[:i], self.watermark)]
+            after = (field, GreaterThan(self.watermark[i]))
+            alternatives.append(And(*equal, after) if equal else after)
+        return Or(*alternatives)
+
+    def order(self):
+        return [self.watermark_field + ".asc"] + [
+            field + ".asc" for field in self.primary_key
+        ]
+
+    def apply(self, row):
+        """
+        Applies a changed row to the mirror and notifies listeners.
+        Returns True if the row differed from the mirrored copy.
+        """
+        key = self.key(row)
+        old = self.rows.get(key, None)
+        # with an IdentityMap, `old` may be the (already updated) instance itself
+        if old is not row and old == row:
+            return False
+        self.table.add(row)
+        for callback in self.listeners:
+            callback(key, old, row)
+        return True
+
+    async def poll(self, headers=None):
+        """
+        Fetches all rows changed since the last poll.
+        Returns the number of rows that changed.
+        """
+        changed = 0
+        while True:
+            filters = list(self.filters)
+            if self.watermark is not None:
+                filters.append(self.keyset_filter())
+
+            received = 0
+            async for row in self.client.select_iter(
+                self.entity_type,
+                filters=filters,
+                headers=headers,
+                limit=self.page_size,
+                order=self.order(),
+            ):
+                received += 1
+                if self.apply(row):
+                    changed += 1
+                self.watermark = (row[self.watermark_field],) + self.key(row)
+
+            if received < self.page_size:
+                return changed
+
+    async def run(self, interval, headers=None):
+        """
+        Polls every `interval` seconds until cancelled
+        """
+        while True:
+            await self.poll(headers=headers)
+            await asyncio.sleep(interval)
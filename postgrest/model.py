@@ -1,7 +1,91 @@
 from collections import UserDict
-from datetime import datetime
+from contextvars import ContextVar
+from datetime import date, datetime, time
 from enum import Enum
 from uuid import UUID
+import weakref
+from .filters import And, Equal, Or, In
+from .timestamps import parse_date, parse_datetime, parse_time
+
+
+_current_identity_map = ContextVar("postgrest_identity_map", default=None)
+
+
+class IdentityMap:
+    """
+    Ensures that rows with the same entity and primary key are represented by a single Model instance.
+    Instances are only weakly referenced, so they are dropped once no longer in use.
+
+    Either pass `identity_map=True` when creating a ModelClient,
+    or use as a context manager to scope one to the current context (e.g. a single request):
+
+        with IdentityMap():
+            foos = await client.select("foo")
+            bars = await client.select("bar")  # bar["owner"] is one of foos
+    """
+
+    def __init__(self):
+        self.instances = weakref.WeakValueDictionary()
+
+    def __enter__(self):
+        self._token = _current_identity_map.set(self)
+        return self
+
+    def __exit__(self, type, value, tb):
+        _current_identity_map.reset(self._token)
+
+    @staticmethod
+    def current(client):
+        """
+        Returns the identity map in effect for `client`, if any
+        """
+        identity_map = _current_identity_map.get()
+        if identity_map is None:
+            identity_map = getattr(client, "identity_map", None)
+        return identity_map
+
+    @staticmethod
+    def key(model, ob):
+        """
+        Returns the identity of the raw row `ob`, or None if it lacks the primary key
+        """
+        try:
+            return (model, tuple(ob[field] for field in model.primary_key))
+        except KeyError:
+            return None
+
+    def add(self, instance, ob):
+        key = self.key(type(instance), ob)
+        if key is not None:
+            instance._identity_raw = ob
+            self.instances[key] = instance
+
+    def load(self, model, client, ob):
+        """
+        Returns the instance for the raw row `ob`.
+        If the row is already known and unchanged it is not decoded again.
+        """
+        key = self.key(model, ob)
+        if key is None:
+            return model.fromJSON(client, ob, identity_map=False)
+
+        instance = self.instances.get(key)
+        if instance is None:
+            instance = model.fromJSON(client, ob, identity_map=False)
+            instance._identity_raw = ob
+            self.instances[key] = instance
+            return instance
+
+        raw = instance._identity_raw
+        if all(k in raw and raw[k] == v for k, v in ob.items()):
+            return instance
+
+        # Refresh from the newer row, without clobbering local modifications
+        for k, v in model.decodeJSON(client, ob).items():
+            if k not in instance.dirty:
+                instance.data[k] = v
+        instance._identity_raw = {**raw, **ob}
+        return instance
 
 
 class ModelReference:
@@ -17,6 +101,7 @@ class ModelReference:
 class Model(UserDict):
     entity_type = None
     field_types = None
+    primary_key = ("id",)
 
     def __init__(self, client, data={}):
         assert self.entity_type is not None
@@ -24,12 +109,36 @@ class Model(UserDict):
         for key, value in data.items():
             self.validate(key, value)
 
+        # fields modified since the Model was last loaded from or written to the server
+        self.dirty = set()
+        # whether the Model is known to exist server-side
+        self.persisted = False
+
         super().__init__(data)
 
         self.client = client
 
     @classmethod
-    def fromJSON(cls, client, ob):
+    def fromJSON(cls, client, ob, identity_map=True):
+        """
+        Creates a Model from a row returned by the server.
+
+        If an IdentityMap is in effect the existing instance for the row is returned instead.
+        """
+        if identity_map:
+            identity_map = IdentityMap.current(client)
+            if identity_map is not None:
+                return identity_map.load(cls, client, ob)
+
+        instance = cls(client, cls.decodeJSON(client, ob))
+        instance.markClean()
+        return instance
+
+    @classmethod
+    def decodeJSON(cls, client, ob):
+        """
+        Converts the fields of a row returned by the server to their field_types
+        """
         data = {}
 
         for key, value in ob.items():
@@ -43,8 +152,16 @@ class Model(UserDict):
                 elif field_type == UUID:
                     value = UUID(hex=value)
                 elif field_type == datetime:
-                    # datetime.fromisoformat isn't suitable as it demands seconds to have 0, 3 or 6 decimal places
-                    value = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S.%f%z")
+                    value = parse_datetime(value)
+                elif field_type == date:
+                    value = parse_date(value)
+                elif field_type == time:
+                    value = parse_time(value)
+                elif field_type == bytes:
+                    # https://www.postgresql.org/docs/current/datatype-binary.html#id-1.5.7.12.9
+                    if not value.startswith("\\x"):
+                        raise ValueError(f"expected hex format bytea for '{key}'")
+                    value = bytes.fromhex(value[2:])
                 elif issubclass(field_type, Enum):
                     value = field_type(value)
                 else:
@@ -53,7 +170,7 @@ class Model(UserDict):
                     ), f"{value} is not valid a {field_type}"
             data[key] = value
 
-        return cls(client, data)
+        return data
 
     @classmethod
     def validate(cls, key, value):
@@ -71,6 +188,19 @@ class Model(UserDict):
         self.validate(key, value)
 
         self.data[key] = value
+        self.dirty.add(key)
+
+    def markClean(self):
+        """
+        Records that the Model's data matches what is stored server-side
+        """
+        raw = getattr(self, "_identity_raw", None)
+        if raw is not None and self.dirty:
+            # the written fields no longer match the row the IdentityMap last saw,
+            # so the next load of the row must decode them again
+            self._identity_raw = {k: v for k, v in raw.items() if k not in self.dirty}
+        self.dirty.clear()
+        self.persisted = True
 
     @classmethod
     def reference(cls, field):
@@ -97,17 +227,87 @@ class Model(UserDict):
 
         return data_dict
 
+    def changedDict(self):
+        """
+        Like shallowDict, but only contains the fields modified since the Model was last saved
+        """
+        return {
+            key: value
+            for key, value in self.shallowDict().items()
+            if key in self.dirty
+        }
+
+    def primaryKey(self):
+        """
+        Returns a tuple of the (shallow) values of the primary key fields
+        """
+        if not self.primary_key:
+            raise ValueError(f"'{self.entity_type}' has no primary key")
+        data = self.shallowDict()
+        values = []
+        for field in self.primary_key:
+            if field in self.dirty and self.persisted:
+                raise ValueError(f"cannot change primary key field '{field}'")
+            value = data.get(field, None)
+            if value is None:
+                raise ValueError(f"primary key field '{field}' is not set")
+            values.append(value)
+        return tuple(values)
+
+    def primaryKeyFilters(self):
+        """
+        Returns filters that select the row this Model represents
+        """
+        return [
+            (field, Equal(value))
+            for field, value in zip(self.primary_key, self.primaryKey())
+        ]
+
+    @classmethod
+    def primaryKeysFilters(cls, models):
+        """
+        Returns filters that select all rows represented by `models`
+        """
+        if len(models) == 1:
+            return models[0].primaryKeyFilters()
+        if len(cls.primary_key) == 1:
+            return [(cls.primary_key[0], In([m.primaryKey()[0] for m in models]))]
+        return [Or(*[And(*m.primaryKeyFilters()) for m in models])]
+
+    def loadRepresentation(self, ob):
+        """
+        Updates the Model from a row returned by the server
+        """
+        self.data.update(self.decodeJSON(self.client, ob))
+        self.markClean()
+
+        identity_map = IdentityMap.current(self.client)
+        if identity_map is not None:
+            identity_map.add(self, ob)
+
     async def insert(self, headers=None, returning="minimal"):
         r = await self.client.insert(
             self.entity_type, self.shallowDict(), headers=headers, returning=returning
         )
         if returning == "representation":
             assert len(r) == 1
-            for key, value in r[0].items():
-                if value is not None:
-                    field_type = self.field_types[key]
-                    if field_type == UUID:
-                        value = UUID(hex=value)
-                self.data[key] = value
-
-    # TODO: patch
+            self.loadRepresentation(r[0])
+        else:
+            self.markClean()
+
+    async def save(self, headers=None):
+        """
+        Sends the fields modified since the Model was last saved as a PATCH
+        to the row identified by the primary key.
+        Does nothing if no fields have been modified.
+        The Model must already exist server-side; use `insert` for new Models.
+        """
+        if not self.persisted:
+            raise ValueError("can't save a Model that hasn't been inserted")
+        if not self.dirty:
+            return
+        filters = self.primaryKeyFilters()
+        await self.client.update(
+            self.entity_type, self.changedDict(), filters, headers=headers
+        )
+        self.markClean()
@@ -1,6 +1,6 @@
 from abc import abstractmethod, ABCMeta
-from .client import Client
-from .model import Model
+from .client import Client, JSONEncoder
+from .model import IdentityMap, Model
 
 
 class ModelClientMetaClass(ABCMeta):
@@ -35,12 +35,111 @@ class ModelClientMetaClass(ABCMeta):
         return entity_map
 
 
+class Session:
+    """
+    A unit of work: collects new and modified Models and writes them in as few requests as possible.
+
+    New Models are inserted in bulk, one request per entity type (and set of provided fields).
+    Modified Models are PATCHed, one request per entity type, set of changed fields and changed values.
+
+    Usually used via `ModelClient.session()`:
+
+        async with client.session() as session:
+            session.add(foo)
+            bar["name"] = "new name"
+            session.add(bar)
+        # changes are flushed on successful exit
+    """
+
+    def __init__(self, client):
+        self.client = client
+        # keyed by id() as Models are unhashable
+        self.models = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, tb):
+        if type is None:
+            await self.flush()
+
+    def add(self, model):
+        """
+        Registers a Model with the session.
+        If it has never been persisted it will be inserted, otherwise its modified fields will be updated.
+        """
+        self.models[id(model)] = model
+
+    def new(self):
+        return [m for m in self.models.values() if not m.persisted]
+
+    def dirty(self):
+        return [m for m in self.models.values() if m.persisted and m.dirty]
+
+    async def flush(self, headers=None, returning="minimal"):
+        """
+        Writes all pending changes.
+
+        returning: pass `"representation"` to have inserted Models updated with
+            server-generated values (e.g. default primary keys)
+        """
+        # Batch inserts per entity_type; rows in a single bulk insert must all provide the same columns
+        inserts = {}
+        for model in self.new():
+            data = model.shallowDict()
+            key = (model.entity_type, frozenset(data.keys()))
+            inserts.setdefault(key, ([], []))
+            inserts[key][0].append(model)
+            inserts[key][1].append(data)
+
+        for (entity_type, _), (models, rows) in inserts.items():
+            r = await self.client.insert(
+                entity_type, rows, headers=headers, returning=returning
+            )
+            if returning == "representation":
+                assert len(r) == len(models)
+                for model, ob in zip(models, r):
+                    model.loadRepresentation(ob)
+            else:
+                for model in models:
+                    model.markClean()
+
+        # Group updates so that Models with identical changes share a single PATCH
+        encoder = JSONEncoder(sort_keys=True)
+        updates = {}
+        for model in self.dirty():
+            patch = model.changedDict()
+            key = (model.entity_type, encoder.encode(patch))
+            updates.setdefault(key, (patch, []))
+            updates[key][1].append(model)
+
+        for (entity_type, _), (patch, models) in updates.items():
+            filters = type(models[0]).primaryKeysFilters(models)
+            await self.client.update(entity_type, patch, filters, headers=headers)
+            for model in models:
+                model.markClean()
+
+
 class ModelClient(Client, metaclass=ModelClientMetaClass):
+    def __init__(self, *args, identity_map=False, **kwargs):
+        """
+        identity_map: if True, rows are deduplicated into a single Model
+            instance per primary key for the lifetime of the client; see `IdentityMap`
+        """
+        super().__init__(*args, **kwargs)
+        self.identity_map = IdentityMap() if identity_map else None
+
     @property
     @abstractmethod
     def entities(self):
         pass
 
+    def session(self):
+        """
+        Returns a new unit of work Session; see `Session`
+        """
+        return Session(self)
+
     async def select(
         self,
         entity_type,
@@ -50,6 +149,7 @@ class ModelClient(Client, metaclass=ModelClientMetaClass):
         singular=False,
         limit=None,
         offset=None,
+        order=None,
     ):
         # Fetch upfront so we get a potential unknown entity failure *before*
         # performing a network operation
@@ -62,6 +162,7 @@ class ModelClient(Client, metaclass=ModelClientMetaClass):
             singular=singular,
             limit=limit,
             offset=offset,
+            order=order,
         )
 
         if singular:
@@ -69,6 +170,28 @@ class ModelClient(Client, metaclass=ModelClientMetaClass):
         else:
             return [entity.fromJSON(self, o) for o in r]
 
+    async def select_iter(
+        self,
+        entity_type,
+        # select=None,
+        filters=None,
+        headers=None,
+        limit=None,
+        offset=None,
+        order=None,
+    ):
+        entity = self.__postgrest_entity_map__[entity_type]
+
+        async for o in super().select_iter(
+            entity_type,
+            filters=filters,
+            headers=headers,
+            limit=limit,
+            offset=offset,
+            order=order,
+        ):
+            yield entity.fromJSON(self, o)
+
     async def update(
         self,
         entity_type,
@@ -77,6 +200,7 @@ class ModelClient(Client, metaclass=ModelClientMetaClass):
         headers=None,
         returning=None,
         # select=None,
+        compression_level=None,
     ):
         # Fetch upfront so we get a potential unknown entity failure *before*
         # performing a network operation
@@ -89,6 +213,7 @@ class ModelClient(Client, metaclass=ModelClientMetaClass):
             headers=headers,
             returning=returning,
             # select=select,
+            compression_level=compression_level,
         )
 
         if returning == "representation":
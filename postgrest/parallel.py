@@ -0,0 +1,241 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import multiprocessing
+from multiprocessing.util import Finalize
+import queue
+from .filters import GreaterThanEqual, LessThan
+from .model import Model
+
+# per worker process state, set up by _init_worker
+_worker_loop = None
+_worker_client = None
+_worker_results = None
+_worker_cancelled = None
+
+
+def _init_worker(client_factory, results, cancelled):
+    global _worker_loop, _worker_client, _worker_results, _worker_cancelled
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+
+    async def create():
+        return client_factory()
+
+    _worker_client = _worker_loop.run_until_complete(create())
+    _worker_results = results
+    _worker_cancelled = cancelled
+    # atexit handlers don't run in pool workers, but multiprocessing's finalizers do
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    _worker_loop.run_until_complete(_worker_client.close())
+    _worker_loop.close()
+
+
+class _Cancelled(Exception):
+    pass
+
+
+def _put(item):
+    # blocks while the queue is full, unless the caller has stopped reading
+    while True:
+        if _worker_cancelled.is_set():
+            raise _Cancelled()
+        try:
+            _worker_results.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            pass
+
+
+def _plain(value):
+    """
+    Converts a Model (and any Models embedded in it) to a dict of decoded values,
+    as Models hold a reference to their client and can't be sent between processes
+    """
+    if isinstance(value, Model):
+        return {k: _plain(v) for k, v in value.shallowDict().items()}
+    return value
+
+
+async def _fetch(tag, query, batch_size):
+    columns = None
+    rows = []
+    async for row in _worker_client.select_iter(**query):
+        row = _plain(row)
+        if columns is None:
+            columns = tuple(row.keys())
+        rows.append(tuple(row.get(c, None) for c in columns))
+        if len(rows) >= batch_size:
+            _put((tag, columns, rows))
+            rows = []
+    if rows:
+        _put((tag, columns, rows))
+
+
+def _run_query(tag, query, batch_size):
+    """
+    Runs a query in a worker, sending the rows to the results queue in
+    batches of (columns, rows as tuples), followed by a batch of None
+    """
+    try:
+        _worker_loop.run_until_complete(_fetch(tag, query, batch_size))
+    except _Cancelled:
+        return
+    finally:
+        if not _worker_cancelled.is_set():
+            _put((tag, None, None))
+
+
+def partition_range(field, boundaries):
+    """
+    Returns filters splitting a table into len(boundaries) + 1 partitions on ranges of `field`,
+    for use with `ProcessPool.scan`. Rows where `field` is NULL aren't included.
+
+        partition_range("created_at", [datetime(2019, 1, 1), datetime(2020, 1, 1)])
+    """
+    partitions = []
+    lower = None
+    for upper in list(boundaries) + [None]:
+        filters = []
+        if lower is not None:
+            filters.append((field, GreaterThanEqual(lower)))
+        if upper is not None:
+            filters.append((field, LessThan(upper)))
+        partitions.append(filters)
+        lower = upper
+    return partitions
+
+
+class ProcessPool:
+    """
+    Runs queries in a pool of worker processes, each with its own event loop and
+    Client, so that decoding responses can use more than one core.
+
+    client_factory: a picklable callable returning a Client (or ModelClient) in the worker,
+        e.g. `functools.partial(MyAPI, "http://localhost:3000/")`
+
+    batch_size: number of rows sent back from a worker at a time
+
+    max_batches: number of batches that may be waiting to be read before workers
+        pause, which bounds memory use when rows are consumed slowly
+
+    Rows are streamed back to the caller in compact batches of tuples. With a ModelClient,
+    rows are decoded in the workers and returned as dicts of decoded values
+    (see `Model.shallowDict`); wrap them with `Model(client, row)` if needed.
+
+        async with ProcessPool(functools.partial(postgrest.Client, url)) as pool:
+            async for row in pool.scan("foo", partition_range("id", range(0, 10 ** 6, 10 ** 4))):
+                ...
+    """
+
+    def __init__(self, client_factory, processes=None, batch_size=1000, max_batches=16):
+        self.batch_size = batch_size
+        self.results = multiprocessing.Queue(max_batches)
+        self.cancelled = multiprocessing.Event()
+        self.executor = ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(client_factory, self.results, self.cancelled),
+        )
+        # results are read from a single queue, so queries are run one `map` at a time
+        self.lock = asyncio.Lock()
+        self.tags = itertools.count()
+
+    def close(self):
+        """
+        Shuts down the workers, blocking until they have exited
+        """
+        self.executor.shutdown()
+        self.results.close()
+
+    async def aclose(self):
+        """
+        Like `close`, but waits for the workers in a thread rather than blocking the event loop
+        """
+        await asyncio.get_event_loop().run_in_executor(None, self.close)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, type, value, tb):
+        await self.aclose()
+
+    def _get(self):
+        try:
+            return self.results.get(timeout=0.1)
+        except queue.Empty:
+            return None
+
+    async def map_batches(self, queries):
+        """
+        Runs each query (a dict of `Client.select_iter` arguments) in a worker.
+        Yields (columns, rows) batches as they are received, with rows as tuples.
+        Batches of different queries are interleaved.
+        """
+        loop = asyncio.get_event_loop()
+        async with self.lock:
+            tag = next(self.tags)
+            futures = [
+                self.executor.submit(_run_query, (tag, i), query, self.batch_size)
+                for i, query in enumerate(queries)
+            ]
+            remaining = len(futures)
+            try:
+                while remaining:
+                    item = await loop.run_in_executor(None, self._get)
+                    if item is None:
+                        # a worker may have failed without being able to say so
+                        for future in futures:
+                            if future.done() and future.exception() is not None:
+                                raise future.exception()
+                        continue
+                    (item_tag, i), columns, rows = item
+                    if item_tag != tag:
+                        # left over from an abandoned call
+                        continue
+                    if columns is None:
+                        # raises the worker's exception, if any
+                        await asyncio.wrap_future(futures[i])
+                        remaining -= 1
+                        continue
+                    yield columns, rows
+            finally:
+                if remaining:
+                    self.cancelled.set()
+                    for future in futures:
+                        future.cancel()
+                    await asyncio.gather(
+                        *[asyncio.wrap_future(f) for f in futures if not f.cancelled()],
+                        return_exceptions=True,
+                    )
+                    self.cancelled.clear()
+
+    async def map(self, queries):
+        """
+        Like `map_batches`, but yields each row as a dict
+        """
+        async for columns, rows in self.map_batches(queries):
+            for row in rows:
+                yield dict(zip(columns, row))
+
+    async def scan(self, entity_type, partitions, filters=None, **kwargs):
+        """
+        Reads a table in partitions (lists of filters, e.g. from `partition_range`),
+        spread across the workers. Yields each row as a dict.
+
+        filters: applied to every partition
+        kwargs: other arguments to `select_iter`, e.g. `order`
+        """
+        queries = [
+            dict(
+                entity_type=entity_type,
+                filters=list(filters or []) + list(partition),
+                **kwargs,
+            )
+            for partition in partitions
+        ]
+        async for row in self.map(queries):
+            yield row
@@ -0,0 +1,142 @@
+"""
+Fast parsers for the date/time formats PostgreSQL emits in JSON
+
+These are many times faster than `datetime.strptime`, and accept the
+variations PostgREST produces: fractional seconds may be absent or have any
+number of digits, and offsets may be `+HH`, `+HH:MM` or `+HH:MM:SS`.
+
+Where the C implementation of `fromisoformat` accepts the value it is used,
+otherwise the value is parsed by slicing at the fixed field positions.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+
+# tzinfo objects are immutable, so one instance is shared per distinct offset
+_timezones = {"Z": timezone.utc, "+00": timezone.utc, "+00:00": timezone.utc}
+_timezones_by_delta = {timedelta(0): timezone.utc}
+
+
+def parse_offset(offset):
+    """
+    Returns a tzinfo for a UTC offset such as `+05`, `-03:30` or `Z`
+    """
+    try:
+        return _timezones[offset]
+    except KeyError:
+        pass
+
+    if offset[0] == "+":
+        sign = 1
+    elif offset[0] == "-":
+        sign = -1
+    else:
+        raise ValueError(f"invalid UTC offset: {offset!r}")
+    parts = offset[1:].split(":")
+    if len(parts) > 3 or any(len(p) != 2 for p in parts):
+        raise ValueError(f"invalid UTC offset: {offset!r}")
+    seconds = 0
+    for part, unit in zip(parts, (3600, 60, 1)):
+        seconds += int(part) * unit
+
+    delta = timedelta(seconds=sign * seconds)
+    tz = _timezones_by_delta.setdefault(delta, timezone(delta))
+    _timezones[offset] = tz
+    return tz
+
+
+def _share_tzinfo(value):
+    """
+    Replaces the tzinfo of `value` with the shared instance for its offset
+    """
+    tz = value.tzinfo
+    if tz is None or tz is timezone.utc:
+        return value
+    shared = _timezones_by_delta.setdefault(tz.utcoffset(None), tz)
+    if shared is tz:
+        return value
+    return value.replace(tzinfo=shared)
+
+
+def _parse_time(value, start):
+    """
+    Parses `HH:MM:SS[.ffffff][offset]` starting at index `start` of `value`.
+    Returns (hour, minute, second, microsecond, tzinfo)
+    """
+    if value[start + 2] != ":" or value[start + 5] != ":":
+        raise ValueError(f"invalid time: {value!r}")
+    hour = int(value[start : start + 2])
+    minute = int(value[start + 3 : start + 5])
+    second = int(value[start + 6 : start + 8])
+
+    i = start + 8
+    end = len(value)
+    microsecond = 0
+    if i < end and value[i] == ".":
+        j = i + 1
+        while j < end and "0" <= value[j] <= "9":
+            j += 1
+        fraction = value[i + 1 : j]
+        if not fraction:
+            raise ValueError(f"invalid time: {value!r}")
+        if len(fraction) >= 6:
+            microsecond = int(fraction[:6])
+        else:
+            microsecond = int(fraction) * 10 ** (6 - len(fraction))
+        i = j
+
+    tzinfo = parse_offset(value[i:]) if i < end else None
+    return hour, minute, second, microsecond, tzinfo
+
+
+def parse_date(value):
+    """
+    Parses a PostgreSQL `date`, e.g. `2019-06-05`
+    """
+    if len(value) != 10 or value[4] != "-" or value[7] != "-":
+        raise ValueError(f"invalid date: {value!r}")
+    try:
+        return date.fromisoformat(value)
+    except (AttributeError, ValueError):
+        return date(int(value[0:4]), int(value[5:7]), int(value[8:10]))
+
+
+def parse_time(value):
+    """
+    Parses a PostgreSQL `time` or `timetz`, e.g. `13:45:00.5` or `13:45:00+10`
+    """
+    if len(value) < 8:
+        raise ValueError(f"invalid time: {value!r}")
+    try:
+        return _share_tzinfo(time.fromisoformat(value))
+    except (AttributeError, ValueError):
+        pass
+    hour, minute, second, microsecond, tzinfo = _parse_time(value, 0)
+    return time(hour, minute, second, microsecond, tzinfo)
+
+
+def parse_datetime(value):
+    """
+    Parses a PostgreSQL `timestamp` or `timestamptz`, e.g. `2019-06-05T13:45:00.123+00:00`
+    """
+    if (
+        len(value) < 19
+        or value[4] != "-"
+        or value[7] != "-"
+        or (value[10] != "T" and value[10] != " ")
+    ):
+        raise ValueError(f"invalid timestamp: {value!r}")
+    try:
+        return _share_tzinfo(datetime.fromisoformat(value))
+    except (AttributeError, ValueError):
+        pass
+    hour, minute, second, microsecond, tzinfo = _parse_time(value, 11)
+    return datetime(
+        int(value[0:4]),
+        int(value[5:7]),
+        int(value[8:10]),
+        hour,
+        minute,
+        second,
+        microsecond,
+        tzinfo,
+    )
@@ -29,5 +29,6 @@ setup(
     use_scm_version=True,
     packages=find_packages(exclude=["tests"]),
     zip_safe=True,
+    python_requires=">=3.7",
     install_requires=["aiohttp"],
 )
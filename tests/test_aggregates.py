@@ -0,0 +1,45 @@
+import unittest
+import asyncio
+from aiohttp import web
+from postgrest.aggregates import Avg, Count, Max, Sum
+from postgrest.client import Client
+from postgrest.filters import GreaterThan
+from tests.test_client import serve
+
+
+class TestAggregates(unittest.TestCase):
+    def test_encoding(self):
+        self.assertEqual(str(Count()), "count()")
+        self.assertEqual(str(Count("id", alias="n")), "n:id.count()")
+        self.assertEqual(str(Avg("amount", cast="int")), "amount.avg()::int")
+        self.assertEqual(
+            Client.prepare_query(select=["category", Sum("amount", alias="total"), Max("amount")]),
+            "select=category,total:amount.sum(),amount.max()",
+        )
+
+    def test_aggregate(self):
+        queries = []
+
+        async def handler(request):
+            queries.append(request.query_string)
+            return web.json_response([{"category": "a", "n": 2, "total": 30}])
+
+        async def run():
+            async with serve(handler) as client:
+                return await client.aggregate(
+                    "foo",
+                    [Count(alias="n"), Sum("amount", alias="total")],
+                    group_by=["category"],
+                    filters=[("amount", GreaterThan(0))],
+                    order=["category"],
+                )
+
+        self.assertEqual(asyncio.run(run()), [{"category": "a", "n": 2, "total": 30}])
+        self.assertEqual(
+            queries,
+            ["select=category,n:count(),total:amount.sum()&amount=gt.0&order=category"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
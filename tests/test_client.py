@@ -0,0 +1,319 @@
+import unittest
+import asyncio
+from contextlib import asynccontextmanager
+import gzip
+import io
+import json
+import pickle
+import tempfile
+import zlib
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from postgrest.client import (
+    Client,
+    Error,
+    csv_value,
+    iter_file_records,
+    iter_json_array,
+    parse_content_range,
+    read_ahead,
+)
+from postgrest.filters import Equal, GreaterThan
+
+
+@asynccontextmanager
+async def serve(handler):
+    """
+    Yields a Client for a local server answering every request with `handler`
+    """
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", handler)
+    async with TestServer(app) as server:
+        async with Client(str(server.make_url("/"))) as client:
+            yield client
+
+
+class ChunkedStream:
+    """
+    Stands in for an aiohttp StreamReader returning the given chunks
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    async def iter_any(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+class TestClient(unittest.TestCase):
+    def test_prepare_query_order(self):
+        self.assertEqual(
+            Client.prepare_query(order=["updated_at.desc", "id"], limit=10),
+            "order=updated_at.desc,id&limit=10",
+        )
+
+    def test_parse_content_range(self):
+        self.assertEqual(parse_content_range("0-24/3573458"), (0, 24, 3573458))
+        self.assertEqual(parse_content_range("0-24/*"), (0, 24, None))
+        self.assertEqual(parse_content_range("*/0"), (None, None, 0))
+        self.assertEqual(parse_content_range("items 10-19/20"), (10, 19, 20))
+        self.assertEqual(parse_content_range(None), (None, None, None))
+
+    def test_csv_value(self):
+        self.assertEqual(csv_value(None), "")
+        self.assertEqual(csv_value(True), "true")
+        self.assertEqual(csv_value({"a": [1]}), '{"a": [1]}')
+        self.assertEqual(csv_value(1.5), 1.5)
+
+    def test_iter_json_array(self):
+        async def elements(chunks):
+            return [e async for e in iter_json_array(ChunkedStream(chunks))]
+
+        expected = [
+            1.5, -20, 3e10, 0, True, False, None, "caf\u00e9 \\\"", {"a": [1, {"b": 2.25}]}, [], 7
+        ]
+        data = (" [ " + ", ".join(json.dumps(e) for e in expected) + " ] ").encode("utf-8")
+        for i in range(len(data) + 1):
+            self.assertEqual(asyncio.run(elements([data[:i], data[i:]])), expected)
+        self.assertEqual(asyncio.run(elements([bytes([b]) for b in data])), expected)
+        self.assertEqual(asyncio.run(elements([b"[", b"]"])), [])
+
+        with self.assertRaises(ValueError):
+            asyncio.run(elements([b"[1, 2"]))
+        with self.assertRaises(ValueError):
+            asyncio.run(elements([b"[1.", b"x]"]))
+
+    def test_export(self):
+        rows = [{"id": 1, "name": "a", "tags": ["x"]}, {"id": 2, "name": "b,c", "tags": None}]
+        csv = b'id,name,tags\n1,a,{x}\n2,"b,c",\n'
+
+        async def handler(request):
+            headers = {"content-range": "0-1/*"}
+            if request.query.get("id") == "eq.0":
+                return web.Response(body=b"", content_type="text/csv", headers={"content-range": "*/*"})
+            if request.headers["accept"] == "text/csv":
+                return web.Response(body=csv, content_type="text/csv", headers=headers)
+            return web.json_response(rows, headers=headers)
+
+        async def run(**kwargs):
+            f = io.BytesIO()
+            calls = []
+            async with serve(handler) as client:
+                result = await client.export(
+                    "foo", f, progress=lambda *args: calls.append(args), chunk_size=16, **kwargs
+                )
+            self.assertEqual(calls[-1], result)
+            self.assertEqual(result[0], len(f.getvalue()))
+            return result, f.getvalue()
+
+        # rows are decoded and re-encoded
+        result, data = asyncio.run(run())
+        self.assertEqual(result[1], 2)
+        self.assertEqual([json.loads(line) for line in data.splitlines()], rows)
+
+        result, data = asyncio.run(run(format="json", raw=False))
+        self.assertEqual(json.loads(data), rows)
+
+        result, data = asyncio.run(run(format="csv", raw=False))
+        self.assertEqual(data, b'id,name,tags\n1,a,"[""x""]"\n2,"b,c",\n')
+
+        # PostgREST's own output is copied as-is, counting rows from Content-Range
+        result, data = asyncio.run(run(format="csv"))
+        self.assertEqual(result, (len(csv), 2))
+        self.assertEqual(data, csv)
+
+        # an empty result
+        result, data = asyncio.run(run(format="csv", filters=[("id", Equal(0))]))
+        self.assertEqual(result, (0, 0))
+
+        with self.assertRaises(ValueError):
+            asyncio.run(run(format="ndjson", raw=True))
+
+    def test_count(self):
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            if request.query.get("size") == "eq.missing":
+                return web.Response(status=404)
+            return web.Response(headers={"content-range": "*/42"})
+
+        async def run():
+            async with serve(handler) as client:
+                self.assertEqual(
+                    await client.count("foo", [("size", GreaterThan(1))], method="planned"), 42
+                )
+                with self.assertRaises(aiohttp.ClientResponseError):
+                    await client.count("foo", [("size", Equal("missing"))])
+                with self.assertRaises(ValueError):
+                    await client.count("foo", method="approximate")
+
+        asyncio.run(run())
+        self.assertEqual(requests[0].method, "HEAD")
+        self.assertEqual(requests[0].headers["prefer"], "count=planned")
+        self.assertEqual(requests[0].query_string, "size=gt.1")
+        self.assertEqual(requests[1].headers["prefer"], "count=exact")
+
+    def test_select_binary(self):
+        data = bytes(range(256)) * 100
+        requests = []
+
+        async def handler(request):
+            requests.append(request)
+            return web.Response(body=data, content_type="application/octet-stream")
+
+        async def run():
+            async with serve(handler) as client:
+                self.assertEqual(await client.select_binary("blob", "data"), data)
+
+                buf = bytearray(len(data) + 10)
+                self.assertEqual(await client.select_binary("blob", "data", into=buf), len(data))
+                self.assertEqual(buf[: len(data)], data)
+
+                with self.assertRaises(ValueError):
+                    await client.select_binary("blob", "data", into=bytearray(len(data) - 1))
+
+                with tempfile.TemporaryFile() as f:
+                    self.assertEqual(await client.select_binary("blob", "data", into=f), len(data))
+                    f.seek(0)
+                    self.assertEqual(f.read(), data)
+
+        asyncio.run(run())
+        self.assertEqual(requests[0].headers["accept"], "application/octet-stream")
+        self.assertEqual(requests[0].query_string, "select=data")
+
+    def test_pickle_error(self):
+        async def handler(request):
+            return web.json_response({"message": "nope", "hint": "try again"}, status=400)
+
+        async def run():
+            async with serve(handler) as client:
+                await client.select("foo")
+
+        with self.assertRaises(Error) as cm:
+            asyncio.run(run())
+        error = pickle.loads(pickle.dumps(cm.exception))
+        self.assertEqual((error.status, error.message, error.hint), (400, "nope", "try again"))
+        self.assertEqual(error.request_info.real_url, cm.exception.request_info.real_url)
+        self.assertIn("nope", str(error))
+
+    def test_iter_file_records(self):
+        async def records(data, format):
+            return [r async for r in iter_file_records(io.BytesIO(data), format, 4)]
+
+        self.assertEqual(
+            asyncio.run(records(b'id,name\r\n1,"multi\nline"\n2,"with ""quotes"""', "csv")),
+            [b"id,name\n", b'1,"multi\nline"\n', b'2,"with ""quotes"""\n'],
+        )
+        self.assertEqual(
+            asyncio.run(records(b'{"id": 1}\n\n  {"id": 2}  \n', "ndjson")),
+            [b'{"id": 1}', b'{"id": 2}'],
+        )
+
+    def test_import_rows(self):
+        bodies = []
+
+        async def handler(request):
+            bodies.append((request.content_type, await request.read()))
+            return web.Response(status=201)
+
+        async def run(source, **kwargs):
+            bodies.clear()
+            async with serve(handler) as client:
+                return await client.import_rows("foo", source, chunk_size=8, **kwargs)
+
+        rows = [{"id": i} for i in range(5)]
+        self.assertEqual(asyncio.run(run(rows)), 5)
+        self.assertEqual(len(bodies), 1)
+        self.assertEqual(json.loads(bodies[0][1]), rows)
+
+        # each request is a complete JSON array
+        self.assertEqual(asyncio.run(run(iter(rows), rows_per_request=2)), 5)
+        self.assertEqual([json.loads(b) for _, b in bodies], [rows[:2], rows[2:4], rows[4:]])
+
+        # the CSV header is repeated for every request
+        csv = io.BytesIO(b"id,name\n1,a\n2,b\n3,c\n")
+        self.assertEqual(asyncio.run(run(csv, format="csv", rows_per_request=2)), 3)
+        self.assertEqual(
+            bodies,
+            [("text/csv", b"id,name\n1,a\n2,b\n"), ("text/csv", b"id,name\n3,c\n")],
+        )
+
+        ndjson = io.BytesIO(b'{"id": 1}\n{"id": 2}\n')
+        self.assertEqual(asyncio.run(run(ndjson, format="ndjson")), 2)
+        self.assertEqual(bodies, [("application/json", b'[{"id": 1},{"id": 2}]')])
+
+        # empty sources make no requests
+        self.assertEqual(asyncio.run(run([])), 0)
+        self.assertEqual(asyncio.run(run(io.BytesIO(b"id,name\n"), format="csv")), 0)
+        self.assertEqual(bodies, [])
+        with self.assertRaises(ValueError):
+            asyncio.run(run(io.BytesIO(b""), format="csv"))
+
+    def test_read_ahead(self):
+        async def run():
+            produced = []
+
+            async def records():
+                for i in range(100):
+                    produced.append(i)
+                    yield b"x"
+
+            consumed = read_ahead(records(), chunk_size=10)
+            await consumed.__anext__()
+            await asyncio.sleep(0.01)
+            # reading continues in the background, but only a few chunks ahead
+            self.assertGreater(len(produced), 10)
+            self.assertLess(len(produced), 50)
+            self.assertEqual(len([r async for r in consumed]), 99)
+
+            async def failing():
+                yield b"x"
+                raise OSError("read failed")
+
+            with self.assertRaises(OSError):
+                [r async for r in read_ahead(failing(), chunk_size=10)]
+
+        asyncio.run(run())
+
+    def test_prepare_body(self):
+        async def run():
+            rows = [{"id": i, "name": "row %d" % i} for i in range(100)]
+
+            async with Client("https://example.com/") as client:
+                headers = {}
+                body = await client.prepare_body(rows, headers)
+                self.assertNotIn("content-encoding", headers)
+
+            async with Client("https://example.com/", compress_threshold=1024) as client:
+                headers = {}
+                small = await client.prepare_body(rows[:1], headers)
+                self.assertNotIn("content-encoding", headers)
+                self.assertEqual(json.loads(small), rows[:1])
+
+                headers = {}
+                compressed = await client.prepare_body(rows, headers)
+                self.assertEqual(headers["content-encoding"], "gzip")
+                self.assertEqual(gzip.decompress(compressed), body)
+                self.assertLess(len(compressed), len(body))
+
+                # compression can be disabled per call
+                headers = {}
+                self.assertEqual(await client.prepare_body(rows, headers, compression_level=0), body)
+                self.assertNotIn("content-encoding", headers)
+
+            async with Client(
+                "https://example.com/", compress_threshold=0, compression="deflate"
+            ) as client:
+                headers = {}
+                compressed = await client.prepare_body(rows, headers, compression_level=9)
+                self.assertEqual(headers["content-encoding"], "deflate")
+                self.assertEqual(zlib.decompress(compressed), body)
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
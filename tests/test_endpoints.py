@@ -0,0 +1,147 @@
+import unittest
+import asyncio
+import os
+import tempfile
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from postgrest.client import Client
+from postgrest.endpoints import Balancer, Endpoint
+
+
+class TestBalancer(unittest.TestCase):
+    def test_roles(self):
+        with self.assertRaises(ValueError):
+            Balancer([Endpoint("http://a/", "read")])
+        with self.assertRaises(ValueError):
+            Balancer([Endpoint("http://a/"), Endpoint("http://b/")])
+        with self.assertRaises(ValueError):
+            Endpoint("http://a/", "primary")
+
+    def test_unix_socket(self):
+        endpoint = Endpoint("unix:/run/postgrest.sock")
+        self.assertEqual(endpoint.url, "http://localhost/")
+        self.assertEqual(endpoint.unix_socket, "/run/postgrest.sock")
+
+        endpoint = Endpoint("http://api.internal/", unix_socket="/run/postgrest.sock")
+        self.assertEqual(endpoint.url, "http://api.internal/")
+        self.assertEqual(endpoint.unix_socket, "/run/postgrest.sock")
+
+        with self.assertRaises(ValueError):
+            Endpoint("unix:/run/a.sock", unix_socket="/run/b.sock")
+
+    def test_unix_socket_client(self):
+        paths = []
+
+        async def handler(request):
+            paths.append(request.path_qs)
+            return web.json_response([{"id": 1}])
+
+        async def run(directory):
+            path = os.path.join(directory, "postgrest.sock")
+            app = web.Application()
+            app.router.add_route("*", "/{tail:.*}", handler)
+            runner = web.AppRunner(app)
+            await runner.setup()
+            try:
+                await web.UnixSite(runner, path).start()
+                async with Client("unix:" + path) as client:
+                    self.assertEqual(await client.select("foo", limit=1), [{"id": 1}])
+                async with Client("http://x/v1/", unix_socket=path) as client:
+                    self.assertEqual(await client.select("foo", limit=1), [{"id": 1}])
+            finally:
+                await runner.cleanup()
+
+        with tempfile.TemporaryDirectory() as directory:
+            asyncio.run(run(directory))
+        self.assertEqual(paths, ["/foo?limit=1", "/v1/foo?limit=1"])
+
+    def test_choose(self):
+        async def run():
+            primary = Endpoint("http://primary/")
+            fast = Endpoint("http://fast/", "read")
+            slow = Endpoint("http://slow/", "read")
+            balancer = Balancer([primary, fast, slow], max_failures=2)
+            balancer.observe(primary, 0.1)
+            balancer.observe(fast, 0.01)
+            balancer.observe(slow, 1.0)
+
+            # writes always go to the primary
+            self.assertTrue(all(balancer.choose(read=False) is primary for _ in range(20)))
+
+            # the slow endpoint loses every comparison
+            chosen = [balancer.choose(read=True) for _ in range(100)]
+            self.assertNotIn(slow, chosen)
+            self.assertIn(fast, chosen)
+
+            # outstanding requests count against an endpoint
+            fast.outstanding = 100
+            chosen = [balancer.choose(read=True) for _ in range(100)]
+            self.assertNotIn(fast, chosen)
+            fast.outstanding = 0
+
+            # repeated failures eject an endpoint, success readmits it
+            balancer.failed(fast)
+            self.assertIn(fast, [balancer.choose(read=True) for _ in range(100)])
+            balancer.failed(fast)
+            self.assertNotIn(fast, [balancer.choose(read=True) for _ in range(100)])
+            balancer.observe(fast, 0.01)
+            self.assertIn(fast, [balancer.choose(read=True) for _ in range(100)])
+
+        asyncio.run(run())
+
+    def test_urls(self):
+        self.assertEqual(Endpoint("http://a/api").url, "http://a/api/")
+
+        async def run():
+            async with Client("http://a/api") as client:
+                self.assertEqual(client.instance_url, "http://a/api/")
+                self.assertEqual(client.prepare_url("foo"), "http://a/api/foo")
+            async with Client("http://a/api", endpoints=[Endpoint("http://b")]) as client:
+                self.assertEqual(client.instance_url, "http://a/api/")
+
+        asyncio.run(run())
+
+    def test_client(self):
+        received = []
+
+        def handler(name, delay):
+            async def handle(request):
+                received.append((name, request.method, request.path_qs))
+                await asyncio.sleep(delay)
+                if request.method == "POST":
+                    return web.Response(status=201, headers={"location": "/foo?id=eq.1"})
+                return web.json_response([])
+
+            app = web.Application()
+            app.router.add_route("*", "/{tail:.*}", handle)
+            return app
+
+        async def run():
+            # the replica is faster, so it should serve most reads
+            async with TestServer(handler("primary", 0.02)) as primary, TestServer(
+                handler("replica", 0)
+            ) as replica:
+                primary_url = str(primary.make_url("/api"))
+                async with Client(
+                    primary_url,
+                    endpoints=[
+                        Endpoint(primary_url),
+                        Endpoint(str(replica.make_url("/v1")), "read"),
+                    ],
+                ) as client:
+                    for _ in range(20):
+                        await client.select("foo", limit=1)
+                    await client.insert("foo", {"id": 1})
+
+        asyncio.run(run())
+        reads = [(name, path) for name, method, path in received if method == "GET"]
+        self.assertIn(("replica", "/v1/foo?limit=1"), reads)
+        self.assertTrue(
+            all(path == ("/v1" if name == "replica" else "/api") + "/foo?limit=1" for name, path in reads)
+        )
+        self.assertGreater(len([r for r in reads if r[0] == "replica"]), 10)
+        self.assertEqual(received[-1], ("primary", "POST", "/api/foo"))
+
+
+if __name__ == "__main__":
+    unittest.main()
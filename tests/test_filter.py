@@ -1,5 +1,30 @@
 import unittest
-from postgrest.filters import Filter
+from datetime import datetime, timezone
+from uuid import UUID
+from postgrest.client import Client
+from postgrest.filters import (
+    And,
+    ContainedIn,
+    Contains,
+    Equal,
+    Filter,
+    FullTextSearch,
+    GreaterThan,
+    ILike,
+    In,
+    Is,
+    LessThan,
+    LessThanEqual,
+    Like,
+    Not,
+    NotAnd,
+    NotEqual,
+    NotOr,
+    Or,
+    Overlap,
+    compile_filters,
+    normalize_filters,
+)
 
 class TestFilters(unittest.TestCase):
     def assertEncoding(self, value, expected, top_level=False):
@@ -18,5 +43,95 @@ class TestFilters(unittest.TestCase):
         self.assertEncoding('slash at end\\', 'slash%20at%20end%5C', True)
         self.assertEncoding('slash at end\\', '%22slash%20at%20end%5C%5C%22')
 
+    def assertMatches(self, filters, rows, expected):
+        predicate = compile_filters(filters)
+        self.assertEqual([r["id"] for r in rows if predicate(r)], expected)
+
+    def test_compile(self):
+        rows = [
+            {"id": 1, "name": "Foo", "size": 10, "tags": ["a", "b"], "flag": True},
+            {"id": 2, "name": "bar", "size": None, "tags": ["b"], "flag": False},
+            {"id": 3, "name": None, "size": 30, "tags": [], "flag": None},
+        ]
+        self.assertMatches([("size", Equal(10))], rows, [1])
+        self.assertMatches([("size", GreaterThan(5)), ("size", LessThanEqual(30))], rows, [1, 3])
+        # comparisons with NULL are never true, even when negated
+        self.assertMatches([("size", NotEqual(10))], rows, [3])
+        self.assertMatches([("size", Not(Equal(10)))], rows, [3])
+        self.assertMatches([("size", Is(None))], rows, [2])
+        self.assertMatches([("size", Not(Is(None)))], rows, [1, 3])
+        self.assertMatches([("flag", Is(False))], rows, [2])
+        self.assertMatches([("name", Like("F*"))], rows, [1])
+        self.assertMatches([("name", ILike("%a_"))], rows, [2])
+        self.assertMatches([("id", In([1, 3]))], rows, [1, 3])
+        self.assertMatches([("id", Not(In([1, None])))], rows, [])
+        self.assertMatches([("tags", Contains(["b"]))], rows, [1, 2])
+        self.assertMatches([("tags", ContainedIn(["b"]))], rows, [2, 3])
+        self.assertMatches([("tags", Overlap(["a"]))], rows, [1])
+        self.assertMatches([Or(("size", Equal(10)), ("name", Equal("bar")))], rows, [1, 2])
+        self.assertMatches([NotOr(("size", Equal(10)), ("name", Equal("bar")))], rows, [])
+        self.assertMatches([NotAnd(("id", GreaterThan(1)), ("size", GreaterThan(20)))], rows, [1])
+
+        # raw JSON rows are compared as the filter value's type
+        raw = [
+            {"id": "7a21f0f4-3900-4ae2-b065-a19f36e01cb1", "at": "2019-06-05T13:45:00+10:00"},
+            {"id": "49b49b06-b8d8-4cfe-88a9-42187ea7d1be", "at": "2019-06-05T03:46:00+00:00"},
+        ]
+        self.assertMatches([("id", Equal(UUID("49b49b06-b8d8-4cfe-88a9-42187ea7d1be")))], raw, [raw[1]["id"]])
+        self.assertMatches(
+            [("at", LessThan(datetime(2019, 6, 5, 3, 45, 30, tzinfo=timezone.utc)))], raw, [raw[0]["id"]]
+        )
+
+        with self.assertRaises(NotImplementedError):
+            compile_filters([("text", FullTextSearch("foo"))])
+        # ranges arrive as strings, and aren't evaluated client-side
+        for f in [Contains("[2,3)"), ContainedIn("[1,10)"), Overlap("[5,6)"), Contains(5)]:
+            with self.assertRaises(NotImplementedError):
+                compile_filters([("span", f)])
+        for f in [Contains([2]), ContainedIn([2]), Overlap([2])]:
+            with self.assertRaises(NotImplementedError):
+                compile_filters([("span", f)])({"span": "[1,10)"})
+
+    def assertNormalizes(self, filters, expected):
+        self.assertEqual(Client.prepare_query(filters=normalize_filters(filters)), expected)
+
+    def test_normalize(self):
+        # flattening and deduplication
+        self.assertNormalizes(
+            [And(("b", Equal(2)), And(("a", Equal(1)), ("b", Equal(2))))], "a=eq.1&b=eq.2"
+        )
+        # merging alternatives into a single `in`
+        self.assertNormalizes(
+            [Or(("a", Equal(2)), ("a", Equal(1)), Or(("a", In([3, 1])), ("b", GreaterThan(1))))],
+            "or=(a.in.(1,2,3),b.gt.1)",
+        )
+        self.assertNormalizes([Or(("a", Equal(1)), ("a", Equal(None)))], "or=(a.eq.1,a.eq.null)")
+        # folding trivial combinators and double negation
+        self.assertNormalizes([Or(("a", Equal(1)))], "a=eq.1")
+        self.assertNormalizes([NotAnd(("a", Equal(1)))], "a=not.eq.1")
+        self.assertNormalizes([NotOr(("a", Not(Equal(1))))], "a=eq.1")
+        self.assertNormalizes([NotOr(And(("a", Equal(1)), ("b", Equal(1))))], "not.and=(a.eq.1,b.eq.1)")
+        self.assertNormalizes([Or(("a", Equal(1)), And())], "")
+        # always true conditions under negations
+        self.assertNormalizes([NotAnd(("a", Equal(1)), And())], "a=not.eq.1")
+        self.assertNormalizes([Or(NotAnd(And()), ("a", Equal(1)))], "a=eq.1")
+        self.assertNormalizes(
+            [NotOr(("a", Equal(1)), And())], "a=is.null&a=not.is.null"
+        )
+        self.assertNormalizes(
+            [("b", Equal(2)), NotOr(NotAnd(And()), ("a", Equal(1)))], "a=not.eq.1&b=eq.2"
+        )
+        with self.assertRaises(ValueError):
+            normalize_filters([NotAnd(And())])
+        # order of conditions doesn't matter
+        self.assertEqual(
+            normalize_filters([Or(("b", LessThan(1)), ("a", Like("x*")))])[0].prepare_query(),
+            normalize_filters([Or(("a", Like("x*")), ("b", LessThan(1)))])[0].prepare_query(),
+        )
+
+    def test_combinatoric_operators(self):
+        self.assertEqual(NotOr.operator, "not.or")
+
+
 if __name__ == '__main__':
     unittest.main()
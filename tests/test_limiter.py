@@ -0,0 +1,121 @@
+import unittest
+import asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from postgrest.client import Client
+from postgrest.limiter import AdaptiveLimiter, BATCH, INTERACTIVE, priority
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+    def test_limit(self):
+        async def run():
+            limiter = AdaptiveLimiter(initial_limit=2, min_limit=1)
+
+            a = await limiter.acquire()
+            b = await limiter.acquire()
+            self.assertEqual(limiter.in_flight, 2)
+
+            # the limit is reached, so further requests queue; interactive ones first
+            order = []
+
+            async def waiter(name, lane):
+                start = await limiter.acquire(lane)
+                order.append(name)
+                return start
+
+            with priority(BATCH):
+                batch = asyncio.ensure_future(waiter("batch", None))
+            interactive = asyncio.ensure_future(waiter("interactive", INTERACTIVE))
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.queue_depth, 2)
+            self.assertEqual(limiter.queue_depths(), {INTERACTIVE: 1, BATCH: 1})
+
+            # successful requests at the limit increase it
+            limiter.release(a, latency=0.01)
+            self.assertGreater(limiter.limit, 2)
+            await asyncio.sleep(0)
+            self.assertEqual(order, ["interactive"])
+
+            # rejections cut the limit, but only once per batch of concurrent requests
+            limiter.release(b, latency=0.01, overloaded=True)
+            self.assertEqual(int(limiter.limit), 1)
+            limiter.release(await interactive, latency=0.01, overloaded=True)
+            self.assertEqual(int(limiter.limit), 1)
+            await asyncio.sleep(0)
+            self.assertEqual(order, ["interactive", "batch"])
+
+            # latency far above the baseline counts as overload
+            limiter.limit = 4
+            limiter.release(await batch, latency=0.1)
+            self.assertEqual(limiter.limit, 2)
+            self.assertEqual(limiter.in_flight, 0)
+
+        asyncio.run(run())
+
+    def test_kinds(self):
+        async def run():
+            limiter = AdaptiveLimiter(initial_limit=4)
+
+            # each kind of request is compared with its own baseline
+            limiter.release(await limiter.acquire(), latency=0.001, kind="count")
+            for _ in range(4):
+                limiter.release(await limiter.acquire(), latency=0.005, kind="select")
+            self.assertEqual(limiter.limit, 4)
+
+            limiter.release(await limiter.acquire(), latency=0.011, kind="select")
+            self.assertEqual(limiter.limit, 2)
+
+        asyncio.run(run())
+
+    def test_client(self):
+        async def handler(request):
+            if request.method == "GET":
+                await asyncio.sleep(0.02)
+                return web.json_response([{"id": 1}])
+            if request.method == "POST":
+                await request.read()
+                return web.Response(status=201)
+            return web.Response(headers={"content-range": "*/1"})
+
+        async def run():
+            app = web.Application()
+            app.router.add_route("*", "/{tail:.*}", handler)
+            async with TestServer(app) as server:
+                limiter = AdaptiveLimiter(initial_limit=32)
+                async with Client(str(server.make_url("/")), limiter=limiter) as client:
+                    # a fast count doesn't make slower selects look like overload
+                    await client.count("foo")
+                    await asyncio.gather(*[client.select("foo") for _ in range(32)])
+                    self.assertGreaterEqual(limiter.limit, 32)
+
+                    # nor does the time taken to stream an upload
+                    async def slow_body():
+                        for i in range(3):
+                            await asyncio.sleep(0.05)
+                            yield b"[]"
+
+                    async with client.request(
+                        "POST", client.prepare_url("foo"), data=slow_body()
+                    ) as response:
+                        self.assertEqual(response.status, 201)
+                    self.assertGreaterEqual(limiter.limit, 32)
+
+        asyncio.run(run())
+
+    def test_cancel(self):
+        async def run():
+            limiter = AdaptiveLimiter(initial_limit=1)
+            start = await limiter.acquire()
+            task = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            task.cancel()
+            await asyncio.sleep(0)
+            self.assertEqual(limiter.queue_depth, 0)
+            limiter.release(start)
+            self.assertEqual(limiter.in_flight, 0)
+
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    unittest.main()
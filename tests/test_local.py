@@ -0,0 +1,81 @@
+import unittest
+from datetime import date, datetime, timezone
+from uuid import UUID
+from postgrest.filters import Equal, GreaterThan, In, Or
+from postgrest.local import LocalTable
+
+
+class TestLocalTable(unittest.TestCase):
+    def test_select(self):
+        table = LocalTable(indexes=["owner", "data"])
+        for i in range(100):
+            table.add({"id": i, "owner": i % 10, "size": i % 7, "data": {"i": i} if i == 5 else None})
+        self.assertEqual(len(table), 100)
+
+        self.assertEqual(
+            [r["id"] for r in table.select([("owner", Equal(3)), ("size", GreaterThan(4))])],
+            [13, 33, 83],
+        )
+        # index lookups only consider matching rows
+        self.assertEqual(len(table._candidates([("owner", In([1, 2]))])), 20)
+        self.assertIsNone(table._candidates([Or(("owner", Equal(1)))]))
+        self.assertEqual(len(table.select([Or(("owner", Equal(1)), ("owner", Equal(2)))])), 20)
+        self.assertEqual([r["id"] for r in table.select([("data", Equal(None))])], [])
+
+        # replacing a row updates indexes
+        table.add({"id": 3, "owner": 4, "size": 0, "data": None})
+        self.assertEqual([r["id"] for r in table.select([("owner", Equal(3))], limit=2)], [13, 23])
+        self.assertEqual(len(table.select([("owner", Equal(4))])), 11)
+        table.remove((3,))
+        self.assertEqual(len(table.select([("owner", Equal(4))])), 10)
+
+        self.assertEqual(
+            [r["id"] for r in table.select([("owner", Equal(9))], order=["size.desc", "id"], limit=3)],
+            [69, 19, 89],
+        )
+
+    def test_uuid_lookup(self):
+        table = LocalTable(indexes=["id"])
+        table.add({"id": "7a21f0f4-3900-4ae2-b065-a19f36e01cb1"})
+        self.assertEqual(
+            len(table.select([("id", Equal(UUID("7a21f0f4-3900-4ae2-b065-a19f36e01cb1")))])), 1
+        )
+
+    def test_index_matches_scan(self):
+        rows = [
+            {"id": 1, "at": "2019-06-05T13:45:00+00:00", "on": "2019-06-05", "owner": 1},
+            {"id": 2, "at": "2019-06-05T13:45:00Z", "on": "2019-06-06", "owner": 1},
+            {"id": 3, "at": None, "on": None, "owner": None},
+        ]
+        scan = LocalTable()
+        indexed = LocalTable(indexes=["at", "on", "owner"])
+        for row in rows:
+            scan.add(row)
+            indexed.add(row)
+
+        at = datetime(2019, 6, 5, 13, 45, tzinfo=timezone.utc)
+        for filters in [
+            [("at", Equal(at))],
+            [("at", In([at]))],
+            [("on", Equal(date(2019, 6, 5)))],
+            [("on", In([date(2019, 6, 5), date(2019, 6, 6), None]))],
+            [("owner", Equal(1))],
+            [("owner", In([1, None]))],
+        ]:
+            self.assertEqual(
+                [r["id"] for r in indexed.select(filters)],
+                [r["id"] for r in scan.select(filters)],
+            )
+        self.assertEqual([r["id"] for r in indexed.select([("at", Equal(at))])], [1, 2])
+
+    def test_order_nulls(self):
+        table = LocalTable()
+        for i, v in enumerate([2, None, 1]):
+            table.add({"id": i, "v": v})
+        self.assertEqual([r["id"] for r in table.select(order=["v"])], [2, 0, 1])
+        self.assertEqual([r["id"] for r in table.select(order=["v.desc"])], [1, 0, 2])
+        self.assertEqual([r["id"] for r in table.select(order=["v.asc.nullsfirst"])], [1, 2, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import asyncio
+from postgrest.client import Client
+from postgrest.mirror import Mirror
+
+
+class FakeClient:
+    """
+    Serves rows from a list, emulating keyset pagination on (updated_at, id)
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def select_iter(self, entity_type, filters=None, headers=None, limit=None, order=None):
+        self.queries.append(Client.prepare_query(filters=filters, limit=limit, order=order))
+        watermark = None
+        for f in filters:
+            watermark = f.filters[1].filters[1][1].value, f.filters[1].filters[0][1].value
+        rows = sorted(self.rows, key=lambda r: (r["updated_at"], r["id"]))
+        if watermark is not None:
+            rows = [r for r in rows if (r["updated_at"], r["id"]) > (watermark[1], watermark[0])]
+        for row in rows[:limit]:
+            yield row
+
+
+class TestMirror(unittest.TestCase):
+    def test_keyset_filter(self):
+        mirror = Mirror(None, "foo")
+        mirror.watermark = ("2019-06-05T13:45:00+00:00", 5)
+        self.assertEqual(
+            Client.prepare_query(filters=[mirror.keyset_filter()], order=mirror.order()),
+            "or=(updated_at.gt.%222019-06-05T13%3A45%3A00%2B00%3A00%22,"
+            "and(updated_at.eq.%222019-06-05T13%3A45%3A00%2B00%3A00%22,id.gt.5))"
+            "&order=updated_at.asc,id.asc",
+        )
+
+    def test_poll(self):
+        rows = [{"id": i, "updated_at": "2019-01-0%d" % (1 + i % 3), "v": 0} for i in range(7)]
+        client = FakeClient(rows)
+        mirror = Mirror(client, "foo", page_size=3)
+        changes = []
+        mirror.add_listener(lambda key, old, new: changes.append((key, old, new)))
+
+        self.assertEqual(asyncio.run(mirror.poll()), 7)
+        self.assertEqual(len(mirror.rows), 7)
+        self.assertEqual(len(client.queries), 3)
+        self.assertEqual(len(changes), 7)
+
+        # Nothing changed
+        changes.clear()
+        self.assertEqual(asyncio.run(mirror.poll()), 0)
+        self.assertEqual(changes, [])
+
+        rows[2] = {"id": 2, "updated_at": "2019-01-05", "v": 1}
+        self.assertEqual(asyncio.run(mirror.poll()), 1)
+        self.assertEqual(changes, [((2,), {"id": 2, "updated_at": "2019-01-03", "v": 0}, rows[2])])
+        self.assertIs(mirror.rows[(2,)], rows[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
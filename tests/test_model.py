@@ -4,7 +4,7 @@ from datetime import datetime
 from enum import Enum
 from uuid import UUID
 from postgrest.client import Client, JSONEncoder
-from postgrest.model import Model
+from postgrest.model import IdentityMap, Model
 
 client = Client(instance_url="https://example.com")
 
@@ -76,6 +76,98 @@ class TestModel(unittest.TestCase):
             '{"id": "49b49b06-b8d8-4cfe-88a9-42187ea7d1be", "owner": "7a21f0f4-3900-4ae2-b065-a19f36e01cb1", "subtype": "x"}',
         )
 
+    def test_dirty_tracking(self):
+        class Foo(Model):
+            entity_type = "foo"
+            field_types = {"id": UUID, "name": str, "size": int}
+
+        foo = Foo.fromJSON(
+            client,
+            {"id": "7a21f0f4-3900-4ae2-b065-a19f36e01cb1", "name": "x", "size": 1},
+        )
+        self.assertTrue(foo.persisted)
+        self.assertEqual(foo.dirty, set())
+        self.assertEqual(foo.changedDict(), {})
+
+        foo["size"] = 2
+        self.assertEqual(foo.changedDict(), {"size": 2})
+        self.assertEqual(
+            client.prepare_query(filters=foo.primaryKeyFilters()),
+            "id=eq.7a21f0f4-3900-4ae2-b065-a19f36e01cb1",
+        )
+
+        foo["id"] = UUID("49b49b06-b8d8-4cfe-88a9-42187ea7d1be")
+        with self.assertRaises(ValueError):
+            foo.primaryKeyFilters()
+
+        # A new Model is entirely dirty
+        new_foo = Foo(client, {"name": "y"})
+        self.assertFalse(new_foo.persisted)
+        self.assertEqual(new_foo.dirty, {"name"})
+
+    def test_bytes(self):
+        class Blob(Model):
+            entity_type = "blob"
+            field_types = {"id": int, "data": bytes}
+
+        blob = Blob.fromJSON(client, {"id": 1, "data": "\\x00ff10"})
+        self.assertEqual(blob["data"], b"\x00\xff\x10")
+        self.assertEqual(
+            JSONEncoder().encode(blob.shallowDict()), '{"id": 1, "data": "\\\\x00ff10"}'
+        )
+        self.assertEqual(JSONEncoder().encode(memoryview(b"\x01")), '"\\\\x01"')
+
+        with self.assertRaises(ValueError):
+            Blob.fromJSON(client, {"id": 1, "data": "escape format"})
+
+    def test_IdentityMap(self):
+        class Foo(Model):
+            entity_type = "foo"
+            field_types = {"id": UUID, "name": str}
+
+        class Bar(Model):
+            entity_type = "bar"
+            field_types = {"id": UUID, "owner": Foo.reference("id")}
+
+        foo_id = "7a21f0f4-3900-4ae2-b065-a19f36e01cb1"
+
+        # Without an identity map every row is a new instance
+        self.assertIsNot(
+            Foo.fromJSON(client, {"id": foo_id}), Foo.fromJSON(client, {"id": foo_id})
+        )
+
+        with IdentityMap() as identity_map:
+            bar = Bar.fromJSON(
+                client,
+                {"id": "49b49b06-b8d8-4cfe-88a9-42187ea7d1be", "owner": foo_id},
+            )
+            foo = Foo.fromJSON(client, {"id": foo_id, "name": "x"})
+            # The reference and the full row resolve to the same instance
+            self.assertIs(bar["owner"], foo)
+            self.assertEqual(foo["name"], "x")
+            self.assertIs(Foo.fromJSON(client, {"id": foo_id, "name": "x"}), foo)
+
+            # Newer rows refresh the instance, but keep local modifications
+            foo["name"] = "local"
+            self.assertIs(Foo.fromJSON(client, {"id": foo_id, "name": "y"}), foo)
+            self.assertEqual(foo["name"], "local")
+
+            # Rows written back by the server are decoded before being registered
+            class Baz(Model):
+                entity_type = "baz"
+                field_types = {"id": int, "created_at": datetime}
+
+            row = {"id": 1, "created_at": "2019-06-05T13:45:00+00:00"}
+            created = Baz(client, {})
+            created.loadRepresentation(row)
+            self.assertIs(Baz.fromJSON(client, dict(row)), created)
+            self.assertIsInstance(created["created_at"], datetime)
+
+            del bar, foo, created
+            self.assertEqual(len(identity_map.instances), 0)
+
+        self.assertIsNone(IdentityMap.current(client))
+
 
 if __name__ == "__main__":
     unittest.main()
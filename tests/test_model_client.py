@@ -3,8 +3,9 @@ import asyncio
 from datetime import datetime
 from enum import Enum
 from uuid import UUID
-from postgrest.model import Model
-from postgrest.model_client import ModelClient
+from postgrest.model import IdentityMap, Model
+from postgrest.client import Client
+from postgrest.model_client import ModelClient, Session
 
 
 class Foo(Model):
@@ -26,6 +27,16 @@ class Bar(Model):
         "details": dict,
     }
 
+class RecordingClient:
+    def __init__(self):
+        self.calls = []
+
+    async def insert(self, entity_type, item, headers=None, returning="minimal"):
+        self.calls.append(("insert", entity_type, item))
+
+    async def update(self, entity_type, patch, filters, headers=None):
+        self.calls.append(("update", entity_type, patch, Client.prepare_query(filters=filters)))
+
 class TestModelClient(unittest.TestCase):
     def test_ModelClient(self):
         # Should be an error to pass non-model objects as entities
@@ -45,5 +56,79 @@ class TestModelClient(unittest.TestCase):
         # metaclass should have added __postgrest_entity_map__ field
         assert MyAPI.__postgrest_entity_map__
 
+    def test_Session(self):
+        client = RecordingClient()
+        session = Session(client)
+
+        a = Foo.fromJSON(client, {"id": "7a21f0f4-3900-4ae2-b065-a19f36e01cb1", "name": "a"})
+        b = Foo.fromJSON(client, {"id": "49b49b06-b8d8-4cfe-88a9-42187ea7d1be", "name": "b"})
+        c = Foo.fromJSON(client, {"id": "f0b7d9f4-07f3-4fc4-9a1a-0ba6d6aef3a4", "name": "c"})
+        for m in (a, b, c):
+            session.add(m)
+        session.add(Foo(client, {"name": "new 1"}))
+        session.add(Foo(client, {"name": "new 2"}))
+
+        a["name"] = "same"
+        b["name"] = "same"
+        c["name"] = "different"
+
+        asyncio.run(session.flush())
+
+        self.assertEqual(client.calls, [
+            ("insert", "foo", [{"name": "new 1"}, {"name": "new 2"}]),
+            ("update", "foo", {"name": "same"}, "id=in.(7a21f0f4-3900-4ae2-b065-a19f36e01cb1,49b49b06-b8d8-4cfe-88a9-42187ea7d1be)"),
+            ("update", "foo", {"name": "different"}, "id=eq.f0b7d9f4-07f3-4fc4-9a1a-0ba6d6aef3a4"),
+        ])
+
+        # Nothing left to flush
+        client.calls.clear()
+        asyncio.run(session.flush())
+        self.assertEqual(client.calls, [])
+
+    def test_save(self):
+        client = RecordingClient()
+        bar = Bar.fromJSON(client, {
+            "id": "49b49b06-b8d8-4cfe-88a9-42187ea7d1be",
+            "created_at": "2019-06-05T13:45:00+00:00",
+            "subtype": "x",
+            "details": {},
+        })
+        bar["subtype"] = MyEnum.y
+        bar["details"] = {"a": 1}
+        asyncio.run(bar.save())
+        self.assertEqual(client.calls, [
+            ("update", "bar", {"subtype": MyEnum.y, "details": {"a": 1}}, "id=eq.49b49b06-b8d8-4cfe-88a9-42187ea7d1be"),
+        ])
+        self.assertEqual(bar.dirty, set())
+
+        # Nothing to save
+        client.calls.clear()
+        asyncio.run(bar.save())
+        self.assertEqual(client.calls, [])
+
+        # New Models must be inserted first
+        with self.assertRaises(ValueError):
+            asyncio.run(Foo(client, {"name": "new"}).save())
+        self.assertEqual(client.calls, [])
+
+    def test_IdentityMap_writes(self):
+        client = RecordingClient()
+        row = {"id": "7a21f0f4-3900-4ae2-b065-a19f36e01cb1", "name": "x"}
+
+        with IdentityMap():
+            foo = Foo.fromJSON(client, dict(row))
+            foo["name"] = "y"
+            asyncio.run(foo.save())
+            # the server's row is decoded again rather than matched against the old one
+            self.assertIs(Foo.fromJSON(client, dict(row)), foo)
+            self.assertEqual(foo["name"], "x")
+
+            session = Session(client)
+            session.add(foo)
+            foo["name"] = "z"
+            asyncio.run(session.flush())
+            Foo.fromJSON(client, dict(row))
+            self.assertEqual(foo["name"], "x")
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import asyncio
+from datetime import datetime
+import functools
+import os
+import tempfile
+from uuid import UUID
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+from postgrest.client import Client, Error
+from postgrest.filters import Equal, GreaterThanEqual, LessThan
+from postgrest.model import Model
+from postgrest.model_client import ModelClient
+from postgrest.parallel import ProcessPool, partition_range
+
+
+class Owner(Model):
+    entity_type = "owner"
+    field_types = {"id": int, "name": str}
+
+
+class Item(Model):
+    entity_type = "item"
+    field_types = {"id": int, "uid": UUID, "at": datetime, "owner": Owner}
+
+
+class API(ModelClient):
+    entities = [Owner, Item]
+
+
+class ClosingClient(Client):
+    def __init__(self, *args, marker, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.marker = marker
+
+    async def close(self):
+        await super().close()
+        with open(os.path.join(self.marker, str(os.getpid())), "w"):
+            pass
+
+
+ROWS = [
+    {
+        "id": i,
+        "uid": "7a21f0f4-3900-4ae2-b065-a19f36e01c%02x" % (i % 256),
+        "at": "2019-06-05T13:45:00+00:00",
+        "owner": {"id": i % 3, "name": "owner %d" % (i % 3)},
+    }
+    for i in range(500)
+]
+
+
+async def handler(request):
+    rows = ROWS
+    for value in request.query.getall("id", []):
+        op, value = value.split(".")
+        if op == "gte":
+            rows = [r for r in rows if r["id"] >= int(value)]
+        elif op == "lt":
+            rows = [r for r in rows if r["id"] < int(value)]
+        else:
+            return web.json_response({"message": "unsupported"}, status=400)
+    return web.json_response(rows)
+
+
+class TestParallel(unittest.TestCase):
+    def test_partition_range(self):
+        partitions = partition_range("id", [10, 20])
+        self.assertEqual(len(partitions), 3)
+        self.assertEqual([(f, type(v), v.value) for f, v in partitions[0]], [("id", LessThan, 10)])
+        self.assertEqual(
+            [(f, type(v), v.value) for f, v in partitions[1]],
+            [("id", GreaterThanEqual, 10), ("id", LessThan, 20)],
+        )
+        self.assertEqual([(f, type(v), v.value) for f, v in partitions[2]], [("id", GreaterThanEqual, 20)])
+        self.assertEqual(partition_range("id", []), [[]])
+
+    def test_scan(self):
+        async def run(marker):
+            app = web.Application()
+            app.router.add_route("*", "/{tail:.*}", handler)
+            async with TestServer(app) as server:
+                url = str(server.make_url("/"))
+                partitions = partition_range("id", range(100, 500, 100))
+
+                factory = functools.partial(ClosingClient, url, marker=marker)
+                async with ProcessPool(factory, processes=2, batch_size=30, max_batches=2) as pool:
+                    batches = [b async for b in pool.map_batches([{"entity_type": "item"}])]
+                    self.assertTrue(all(len(rows) <= 30 for _, rows in batches))
+                    self.assertEqual(sum(len(rows) for _, rows in batches), 500)
+
+                    rows = [row async for row in pool.scan("item", partitions)]
+                    self.assertEqual(sorted(r["id"] for r in rows), list(range(500)))
+                    self.assertIsInstance(rows[0]["uid"], str)
+
+                    # stopping early doesn't leave the pool stuck
+                    async for row in pool.scan("item", partitions):
+                        break
+                    self.assertEqual(len([r async for r in pool.scan("item", partitions)]), 500)
+
+                    with self.assertRaises(Error):
+                        [r async for r in pool.scan("item", [[("id", Equal(1))]])]
+
+                async with ProcessPool(functools.partial(API, url), processes=2) as pool:
+                    rows = [row async for row in pool.scan("item", partitions)]
+                    self.assertEqual(len(rows), 500)
+                    row = min(rows, key=lambda r: r["id"])
+                    # decoded in the workers, including embedded Models
+                    self.assertIsInstance(row["uid"], UUID)
+                    self.assertIsInstance(row["at"], datetime)
+                    self.assertEqual(row["owner"], {"id": 0, "name": "owner 0"})
+
+                # shutting down doesn't block the event loop
+                pool = ProcessPool(factory, processes=2)
+                self.assertEqual(len([r async for r in pool.scan("item", partitions)]), 500)
+                ticks = 0
+
+                async def tick():
+                    nonlocal ticks
+                    while True:
+                        ticks += 1
+                        await asyncio.sleep(0)
+
+                ticker = asyncio.ensure_future(tick())
+                await pool.aclose()
+                ticker.cancel()
+                self.assertGreater(ticks, 1)
+
+        with tempfile.TemporaryDirectory() as marker:
+            asyncio.run(run(marker))
+            # worker sessions are closed when the pool shuts down
+            self.assertEqual(len(os.listdir(marker)), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
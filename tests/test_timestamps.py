@@ -0,0 +1,61 @@
+import unittest
+from datetime import date, datetime, time, timedelta, timezone
+from postgrest.timestamps import parse_date, parse_datetime, parse_time
+
+
+class TestTimestamps(unittest.TestCase):
+    def test_parse_datetime(self):
+        self.assertEqual(
+            parse_datetime("2019-06-05T13:45:00.123456+00:00"),
+            datetime(2019, 6, 5, 13, 45, 0, 123456, timezone.utc),
+        )
+        # No fractional seconds
+        self.assertEqual(
+            parse_datetime("2019-06-05T13:45:00+00:00"),
+            datetime(2019, 6, 5, 13, 45, 0, 0, timezone.utc),
+        )
+        # Trailing zeros are trimmed by PostgreSQL
+        self.assertEqual(
+            parse_datetime("2019-06-05T13:45:00.5+05:30"),
+            datetime(2019, 6, 5, 13, 45, 0, 500000, timezone(timedelta(hours=5, minutes=30))),
+        )
+        # Short offsets and a space separator
+        self.assertEqual(
+            parse_datetime("2019-06-05 13:45:00.12-03"),
+            datetime(2019, 6, 5, 13, 45, 0, 120000, timezone(timedelta(hours=-3))),
+        )
+        # Offsets with seconds
+        self.assertEqual(
+            parse_datetime("1900-01-01T00:00:00+10:04:48").utcoffset(),
+            timedelta(hours=10, minutes=4, seconds=48),
+        )
+        # timestamp without time zone
+        self.assertEqual(
+            parse_datetime("2019-06-05T13:45:00"), datetime(2019, 6, 5, 13, 45)
+        )
+        # tzinfo objects are shared
+        self.assertIs(
+            parse_datetime("2019-06-05T13:45:00+05:30").tzinfo,
+            parse_datetime("2020-01-01T00:00:00.1+05:30").tzinfo,
+        )
+
+        for invalid in ["infinity", "2019-06-05", "2019-06-05X13:45:00", "2019-06-05T13:45:00+5"]:
+            with self.assertRaises(ValueError):
+                parse_datetime(invalid)
+
+    def test_parse_date(self):
+        self.assertEqual(parse_date("2019-06-05"), date(2019, 6, 5))
+        with self.assertRaises(ValueError):
+            parse_date("2019-06-05T13:45:00")
+
+    def test_parse_time(self):
+        self.assertEqual(parse_time("13:45:00"), time(13, 45))
+        self.assertEqual(parse_time("13:45:00.25"), time(13, 45, 0, 250000))
+        self.assertEqual(
+            parse_time("13:45:00+10"),
+            time(13, 45, tzinfo=timezone(timedelta(hours=10))),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()